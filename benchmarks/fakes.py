@@ -0,0 +1,139 @@
+import time
+import json
+import random
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import BaseModel
+
+
+EMBEDDING_DIMENSIONS = 1536
+STREAM_CHUNK_CHARS = 40
+
+# 가짜 모델 지연 시간 (run_benchmark.py에서 설정)
+latency = {
+    "embedding_ms": 0.0,
+    "llm_ms": 200.0,
+    "llm_jitter_ms": 50.0,
+}
+
+
+# 텍스트 해시로 만드는 결정적 벡터 (같은 텍스트는 항상 같은 벡터)
+# dimensions: OpenAIEmbeddings와 같은 인자 (EMBEDDING_DIMENSIONS)
+class HashEmbeddings(Embeddings):
+    def __init__(self, *args, dimensions: Optional[int] = None, **kwargs):
+        self.dimensions = dimensions or EMBEDDING_DIMENSIONS
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if latency["embedding_ms"]:
+            time.sleep(latency["embedding_ms"] / 1000)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if latency["embedding_ms"]:
+            await asyncio.sleep(latency["embedding_ms"] / 1000)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+# 출력 스키마 필드를 채운 예시 응답
+def sample_output(schema: type) -> Dict[str, Any]:
+    values = {}
+    for name, field in schema.model_fields.items():
+        annotation = field.annotation
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            values[name] = sample_output(annotation)
+        elif getattr(annotation, "__origin__", None) is list:
+            values[name] = [f"{index}. {name} 단계" for index in range(1, 4)]
+        else:
+            values[name] = f"{name} " + "내용 " * 20
+    return values
+
+
+# 지연 시간을 설정할 수 있는 JSON 응답 채팅 모델 (모든 프롬프트 타입 스키마 필드를 포함해 응답)
+class FakeChatModel(BaseChatModel):
+    answer: Dict[str, Any] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _delay(self) -> float:
+        return max(0.0, random.gauss(latency["llm_ms"], latency["llm_jitter_ms"])) / 1000
+
+    def _usage(self, messages) -> Dict[str, int]:
+        input_tokens = sum(len(str(message.content)) for message in messages) // 3
+        output_tokens = len(self._text()) // 3
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _text(self) -> str:
+        return json.dumps(self.answer, ensure_ascii=False)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._delay())
+        message = AIMessage(content=self._text(), usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        message = AIMessage(content=self._text(), usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # 전체 지연 시간을 청크 수로 나눠 토큰이 흘러나오는 것처럼 전송
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self._text()
+        pieces = [text[start:start + STREAM_CHUNK_CHARS] for start in range(0, len(text), STREAM_CHUNK_CHARS)]
+        delay = self._delay() / max(1, len(pieces))
+        for piece in pieces:
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages)))
+
+
+# 로컬(in-memory) Qdrant를 동기 클라이언트 하나로 공유하고, 비동기 클라이언트는 같은 저장소를 스레드에서 호출
+# (로컬 모드는 payload 인덱스 없이 전체를 훑으므로 검색 시간은 실제 Qdrant보다 길게 나옴)
+class SharedAsyncQdrantClient:
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
+
+
+# server.py/embedding_service.py를 import하기 전에 호출해야 함
+# (embedding_service는 import 시점에 QdrantClient/OpenAIEmbeddings를 가져오고,
+#  검색/LLM 클라이언트는 서버 시작 후 rag_service.init_services()에서 이 모듈들의 속성을 읽어 생성)
+# local_qdrant=False면 QDRANT_HOST/QDRANT_PORT의 실제 Qdrant를 사용
+def install(schemas: List[type], local_qdrant: bool = True):
+    import langchain_openai
+    import qdrant_client
+
+    answer = {}
+    for schema in schemas:
+        answer.update(sample_output(schema))
+
+    langchain_openai.OpenAIEmbeddings = HashEmbeddings
+    langchain_openai.ChatOpenAI = lambda *args, **kwargs: FakeChatModel(answer=answer)
+    if local_qdrant:
+        local_client = qdrant_client.QdrantClient(location=":memory:")
+        qdrant_client.QdrantClient = lambda *args, **kwargs: local_client
+        qdrant_client.AsyncQdrantClient = lambda *args, **kwargs: SharedAsyncQdrantClient(local_client)
@@ -0,0 +1,202 @@
+"""양자화/HNSW 설정별 검색 정확도(recall@k)와 지연 시간을 실제 Qdrant에서 측정하는 리포트.
+
+    python benchmarks/recall_report.py --qdrant-host localhost --points 100000 --quantization none,scalar,binary \
+        --ef 32,64,128 --oversampling 1,2,4 --json recall.json
+
+정답은 numpy로 계산한 정확한(brute-force) 코사인 top-k이며, 운영 인덱스의 벡터로 측정하려면
+--source-collection에 레포 alias(예: java-files-owner__repo)를 지정합니다.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SERVER_DIR = BENCHMARK_DIR.parent / "ssom_server"
+sys.path[:0] = [str(SERVER_DIR)]
+
+# 벡터 원소 하나의 저장 크기 (byte)
+BYTES_PER_DIMENSION = {"none": 4, "scalar": 1, "binary": 1 / 8}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Qdrant 양자화/HNSW recall-지연 시간 리포트")
+    parser.add_argument("--qdrant-host", default="localhost")
+    parser.add_argument("--qdrant-port", type=int, default=6333)
+    parser.add_argument("--source-collection", help="벡터를 가져올 기존 컬렉션/alias (생략하면 합성 벡터)")
+    parser.add_argument("--points", type=int, default=50000, help="색인할 벡터 수")
+    parser.add_argument("--dimensions", type=int, default=1536, help="합성 벡터 차원")
+    parser.add_argument("--clusters", type=int, default=200, help="합성 벡터 클러스터 수 (코드 청크처럼 비슷한 벡터가 몰리도록)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--quantization", default="none,scalar,binary", help="비교할 양자화 방식 (쉼표 구분)")
+    parser.add_argument("--ef", default="0,32,64,128,256", help="검색 시 hnsw_ef 값 (0은 Qdrant 기본값)")
+    parser.add_argument("--oversampling", default="1,2,4", help="양자화 컬렉션 oversampling 값")
+    parser.add_argument("--hnsw-m", type=int, help="HNSW_M 대신 사용")
+    parser.add_argument("--hnsw-ef-construct", type=int, help="HNSW_EF_CONSTRUCT 대신 사용")
+    parser.add_argument("--on-disk", action="store_true", help="원본 벡터와 HNSW 그래프를 디스크에 저장")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="측정용 컬렉션을 지우지 않음")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON 파일로 저장")
+    return parser.parse_args()
+
+
+def split_values(value: str, cast):
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+# collection_manager가 Settings에서 HNSW/저장 방식을 읽으므로 import 전에 환경 변수로 지정
+def prepare_environment(args):
+    os.environ.setdefault("OPENAI_API_KEY", "recall-report")
+    os.environ.update({"QDRANT_HOST": args.qdrant_host, "QDRANT_PORT": str(args.qdrant_port)})
+    if args.hnsw_m is not None:
+        os.environ["HNSW_M"] = str(args.hnsw_m)
+    if args.hnsw_ef_construct is not None:
+        os.environ["HNSW_EF_CONSTRUCT"] = str(args.hnsw_ef_construct)
+    if args.on_disk:
+        os.environ.update({"VECTOR_ON_DISK": "true", "HNSW_ON_DISK": "true"})
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def synthetic_vectors(args, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((args.clusters, args.dimensions)).astype(np.float32)
+    labels = rng.integers(0, args.clusters, size=args.points)
+    noise = rng.standard_normal((args.points, args.dimensions)).astype(np.float32)
+    return normalize(centers[labels] + noise * 0.8)
+
+def load_vectors(client, collection_name: str, limit: int) -> np.ndarray:
+    vectors, offset = [], None
+    while len(vectors) < limit:
+        points, offset = client.scroll(
+            collection_name, limit=min(1000, limit - len(vectors)), offset=offset,
+            with_payload=False, with_vectors=True,
+        )
+        vectors.extend(point.vector for point in points)
+        if offset is None:
+            break
+    return normalize(np.asarray(vectors, dtype=np.float32))
+
+# 질의: 색인된 벡터 근처의 새 벡터 (로그 질의가 관련 코드 청크 근처에 오는 상황)
+def make_queries(vectors: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    base = vectors[rng.integers(0, len(vectors), size=count)]
+    return normalize(base + rng.standard_normal(base.shape).astype(np.float32) * 0.05)
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> list:
+    truth = []
+    for start in range(0, len(queries), 64):
+        scores = queries[start:start + 64] @ vectors.T
+        top = np.argpartition(-scores, k, axis=1)[:, :k]
+        truth.extend(set(row.tolist()) for row in top)
+    return truth
+
+
+def wait_until_indexed(client, collection_name: str, timeout: float = 1800):
+    from qdrant_client.http.models import CollectionStatus
+
+    started_at = time.monotonic()
+    while time.monotonic() - started_at < timeout:
+        if client.get_collection(collection_name).status == CollectionStatus.GREEN:
+            return
+        time.sleep(1)
+    raise TimeoutError(f"{collection_name} 인덱싱이 {timeout}초 안에 끝나지 않았습니다.")
+
+def build_collection(client, name: str, vectors: np.ndarray, quantization: str) -> dict:
+    from collection_manager import get_collection_config
+
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    started_at = time.perf_counter()
+    client.create_collection(name, **get_collection_config(size=vectors.shape[1], quantization=quantization))
+    client.upload_collection(name, vectors=vectors, ids=range(len(vectors)), batch_size=256)
+    wait_until_indexed(client, name)
+    info = client.get_collection(name)
+    return {
+        "build_seconds": round(time.perf_counter() - started_at, 1),
+        "indexed_vectors": info.indexed_vectors_count,
+        "segments": info.segments_count,
+        "vector_ram_mb": round(len(vectors) * vectors.shape[1] * BYTES_PER_DIMENSION[quantization] / (1024 * 1024), 1),
+    }
+
+def measure(client, name: str, queries: np.ndarray, truth: list, k: int, search_params) -> dict:
+    # 첫 요청의 연결/캐시 비용은 제외
+    for query in queries[:5]:
+        client.query_points(name, query=query.tolist(), limit=k, search_params=search_params)
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started_at = time.perf_counter()
+        response = client.query_points(name, query=query.tolist(), limit=k, search_params=search_params)
+        latencies.append(time.perf_counter() - started_at)
+        hits += len(expected & {point.id for point in response.points})
+    latencies.sort()
+    return {
+        "recall": round(hits / (len(queries) * k), 4),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2),
+    }
+
+
+def main():
+    args = parse_args()
+    prepare_environment(args)
+    from qdrant_client import QdrantClient
+    from collection_manager import get_search_params
+    from settings import settings
+
+    client = QdrantClient(host=args.qdrant_host, port=args.qdrant_port, timeout=120)
+    rng = np.random.default_rng(args.seed)
+    if args.source_collection:
+        vectors = load_vectors(client, args.source_collection, args.points)
+    else:
+        vectors = synthetic_vectors(args, rng)
+    queries = make_queries(vectors, args.queries, rng)
+    truth = exact_top_k(vectors, queries, args.k)
+
+    rows, collections = [], {}
+    for quantization in split_values(args.quantization, str):
+        name = f"recall-report-{quantization}-{os.getpid()}"
+        collections[quantization] = build_collection(client, name, vectors, quantization)
+        print(f"{quantization}: {collections[quantization]}", file=sys.stderr)
+        variants = [(1.0, True)] if quantization == "none" else [
+            (oversampling, rescore) for oversampling in split_values(args.oversampling, float) for rescore in (True, False)
+        ]
+        try:
+            for ef in split_values(args.ef, int):
+                for oversampling, rescore in variants:
+                    params = get_search_params(hnsw_ef=ef, rescore=rescore, oversampling=oversampling)
+                    rows.append({
+                        "quantization": quantization, "ef": ef, "oversampling": oversampling, "rescore": rescore,
+                        **measure(client, name, queries, truth, args.k, params),
+                    })
+        finally:
+            if not args.keep:
+                client.delete_collection(name)
+
+    print(f"| quantization | ef | oversampling | rescore | recall@{args.k} | p50 ms | p95 ms |")
+    print("|---|---|---|---|---|---|---|")
+    for row in rows:
+        print(
+            f"| {row['quantization']} | {row['ef'] or 'default'} | {row['oversampling']} | {row['rescore']} "
+            f"| {row['recall']} | {row['p50_ms']} | {row['p95_ms']} |"
+        )
+
+    if args.json_path:
+        result = {
+            "config": {
+                **{key: value for key, value in vars(args).items() if key != "json_path"},
+                "points": len(vectors), "dimensions": int(vectors.shape[1]),
+                "hnsw_m": settings.hnsw_m, "hnsw_ef_construct": settings.hnsw_ef_construct,
+            },
+            "collections": collections,
+            "results": rows,
+        }
+        Path(args.json_path).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
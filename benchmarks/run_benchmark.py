@@ -0,0 +1,260 @@
+"""OpenAI/Qdrant 없이 server.py 앱을 그대로 띄워 인덱싱 처리량과 API 지연 시간을 측정하는 벤치마크.
+
+    python benchmarks/run_benchmark.py --files 200 --requests 200 --concurrency 16 --json result.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import tempfile
+import tracemalloc
+import warnings
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SERVER_DIR = BENCHMARK_DIR.parent / "ssom_server"
+sys.path[:0] = [str(SERVER_DIR), str(BENCHMARK_DIR)]
+
+ENDPOINTS = {
+    "summary": "/api/logs/summary",
+    "issues": "/api/logs/issues",
+    "batch": "/api/logs/issues/batch",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ssom_server 오프라인 벤치마크")
+    parser.add_argument("--files", type=int, default=200, help="합성 레포의 .java 파일 수")
+    parser.add_argument("--methods", type=int, default=8, help="클래스당 메소드 수")
+    parser.add_argument("--requests", type=int, default=200, help="API 요청 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 요청 수")
+    parser.add_argument("--logs-per-request", type=int, default=20, help="요청당 로그 수 (batch는 장애당)")
+    parser.add_argument("--incidents-per-request", type=int, default=5, help="batch 요청당 장애 수")
+    parser.add_argument("--stack-trace-ratio", type=float, default=0.7, help="스택트레이스가 있는 로그 비율")
+    parser.add_argument("--unique-ratio", type=float, default=0.2, help="요청 안에서 서로 다른 로그 비율")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="issues")
+    parser.add_argument("--stream", action="store_true", help="SSE 스트리밍 모드로 요청 (summary/issues)")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--response-cache", action="store_true", help="응답 캐시 사용 (기본은 꺼서 전체 경로를 측정)")
+    parser.add_argument("--qdrant-host", help="지정하면 in-memory 대신 실제 Qdrant 사용 (벤치마크 전용 컬렉션 이름으로)")
+    parser.add_argument("--qdrant-port", type=int, default=6333)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc으로 Python 힙 최대 사용량 측정 (측정 중 처리 속도가 느려짐)")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--max-p95-ms", type=float, help="API p95 지연 시간이 이 값을 넘으면 실패 (CI용)")
+    parser.add_argument("--min-chunks-per-second", type=float, help="인덱싱 처리량이 이 값보다 낮으면 실패 (CI용)")
+    return parser.parse_args()
+
+
+# 서버 모듈은 import 시점에 설정/클라이언트를 만들므로 환경 변수와 가짜 모델을 먼저 준비
+def prepare_environment(args, workdir: Path):
+    os.chdir(workdir)
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "QDRANT_HOST": args.qdrant_host or "localhost",
+        "QDRANT_PORT": str(args.qdrant_port),
+        "COLLECTION_NAME": f"ssom-benchmark-{os.getpid()}",
+        "RESPONSE_CACHE_ENABLED": "true" if args.response_cache else "false",
+        "EMBEDDING_CACHE_PATH": str(workdir / "cache" / "embeddings.sqlite3"),
+    })
+    warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+
+    import fakes
+    from log_summary_prompt import get_output_schema as get_log_schema
+    from github_issue_prompt import get_output_schema as get_github_schema
+
+    fakes.latency.update({
+        "embedding_ms": args.embedding_latency_ms,
+        "llm_ms": args.llm_latency_ms,
+        "llm_jitter_ms": args.llm_jitter_ms,
+    })
+    fakes.install([get_log_schema(), get_github_schema()], local_qdrant=args.qdrant_host is None)
+
+
+def percentile(values, ratio: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(ratio * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark_indexing(args, workdir: Path, symbols_out: list) -> dict:
+    from synthetic import generate_java_repo
+    from embedding_service import embed_documents
+
+    repo_dir = workdir / "synthetic-repo"
+    symbols_out.extend(generate_java_repo(repo_dir, args.files, args.methods, args.seed))
+
+    started_at = time.perf_counter()
+    summary = embed_documents(f"file://{repo_dir}")
+    elapsed = time.perf_counter() - started_at
+    return {
+        "files": summary["embedded"],
+        "chunks": summary["chunks"],
+        "seconds": round(elapsed, 3),
+        "chunks_per_second": round(summary["chunks"] / elapsed, 1) if elapsed else None,
+    }
+
+
+# ASGI 앱을 직접 호출 (httpx ASGITransport는 응답 전체를 모은 뒤 돌려줘서 스트리밍 첫 바이트 시간을 잴 수 없음)
+# 반환: (상태 코드, 첫 본문 바이트를 받은 시각)
+async def call_app(app, path: str, query: str, body: bytes):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"benchmark"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0), "server": ("benchmark", 80),
+    }
+    status, first_byte_at = None, None
+    request_sent, response_done = False, asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, first_byte_at
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            if first_byte_at is None and message.get("body"):
+                first_byte_at = time.perf_counter()
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    response_done.set()
+    return status, first_byte_at
+
+
+async def benchmark_endpoint(args, symbols: list) -> dict:
+    import server
+    from synthetic import generate_log_batch
+
+    rng = random.Random(args.seed)
+    payloads = []
+    for _ in range(args.requests):
+        if args.endpoint == "batch":
+            payloads.append({"incidents": [
+                generate_log_batch(rng, symbols, args.logs_per_request, args.stack_trace_ratio, args.unique_ratio)
+                for _ in range(args.incidents_per_request)
+            ]})
+        else:
+            payloads.append({"log": generate_log_batch(rng, symbols, args.logs_per_request, args.stack_trace_ratio, args.unique_ratio)})
+    url = ENDPOINTS[args.endpoint] + ("?stream=true" if args.stream and args.endpoint != "batch" else "")
+
+    path, _, query = url.partition("?")
+
+    latencies, first_bytes, errors = [], [], 0
+    queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            payload = queue.get_nowait()
+            started_at = time.perf_counter()
+            status, first_byte_at = await call_app(server.app, path, query, json.dumps(payload).encode("utf-8"))
+            finished_at = time.perf_counter()
+            latencies.append(finished_at - started_at)
+            first_bytes.append((first_byte_at or finished_at) - started_at)
+            errors += 0 if status == 200 else 1
+
+    async with server.lifespan(server.app):
+        # 백그라운드 초기화(Qdrant 연결/체인 생성)가 끝난 뒤부터 측정
+        await server.app.state.init_task
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started_at
+
+    to_ms = lambda seconds: round(seconds * 1000, 1)
+    return {
+        "endpoint": url,
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": to_ms(percentile(latencies, 0.50)),
+        "p95_ms": to_ms(percentile(latencies, 0.95)),
+        "p99_ms": to_ms(percentile(latencies, 0.99)),
+        "first_byte_p50_ms": to_ms(percentile(first_bytes, 0.50)),
+        "first_byte_p95_ms": to_ms(percentile(first_bytes, 0.95)),
+    }
+
+
+# 실제 Qdrant를 쓴 경우 벤치마크용 버전 컬렉션 삭제 (컬렉션을 지우면 alias도 함께 삭제됨)
+def cleanup_collections():
+    import rag_service
+    from collection_manager import list_versions
+    from index_state import load_index_state
+    from settings import settings
+
+    client = rag_service.client
+    aliases = {settings.collection_name, *(repo_state["alias"] for repo_state in load_index_state().values())}
+    for alias in aliases:
+        for collection_name in list_versions(client, alias):
+            client.delete_collection(collection_name)
+
+
+def main():
+    args = parse_args()
+    json_path = Path(args.json_path).resolve() if args.json_path else None
+    with tempfile.TemporaryDirectory(prefix="ssom-benchmark-") as tmp:
+        workdir = Path(tmp)
+        prepare_environment(args, workdir)
+
+        if args.trace_memory:
+            tracemalloc.start()
+        symbols = []
+        indexing = benchmark_indexing(args, workdir, symbols)
+        api = asyncio.run(benchmark_endpoint(args, symbols))
+        traced_peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+        tracemalloc.stop()
+        if args.qdrant_host:
+            cleanup_collections()
+
+    # ru_maxrss는 Linux에서 KB, macOS에서 byte 단위
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+    result = {
+        "config": {key: value for key, value in vars(args).items() if key != "json_path"},
+        "indexing": indexing,
+        "api": api,
+        "memory": {
+            "python_peak_mb": round(traced_peak / (1024 * 1024), 1) if traced_peak is not None else None,
+            "max_rss_mb": round(max_rss_mb, 1),
+        },
+    }
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if json_path:
+        json_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    failures = []
+    if api["errors"]:
+        failures.append(f"요청 {api['errors']}건 실패")
+    if args.max_p95_ms is not None and api["p95_ms"] > args.max_p95_ms:
+        failures.append(f"p95 {api['p95_ms']}ms > {args.max_p95_ms}ms")
+    if args.min_chunks_per_second is not None and (indexing["chunks_per_second"] or 0) < args.min_chunks_per_second:
+        failures.append(f"인덱싱 {indexing['chunks_per_second']} 청크/초 < {args.min_chunks_per_second}")
+    if failures:
+        print("벤치마크 기준 미달: " + ", ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import random
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+METHOD_TEMPLATE = """
+    /** {class_name}의 {method} 처리 */
+    public {return_type} {method}(String id, int amount) {{
+        if (id == null || id.isEmpty()) {{
+            throw new IllegalArgumentException("id is required: " + amount);
+        }}
+        Map<String, Object> context = new HashMap<>();
+        context.put("id", id);
+        context.put("amount", amount);
+        for (int i = 0; i < amount % 7; i++) {{
+            context.put("step" + i, repository.find(id + i));
+        }}
+        log.debug("{method} done {{}}", context);
+        return {return_value};
+    }}
+"""
+
+CLASS_TEMPLATE = """package {package};
+
+import java.util.HashMap;
+import java.util.Map;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+
+/**
+ * 벤치마크용 합성 클래스 {class_name}
+ */
+public class {class_name} {{
+    private static final Logger log = LoggerFactory.getLogger({class_name}.class);
+    private final Repository repository;
+
+    public {class_name}(Repository repository) {{
+        this.repository = repository;
+    }}
+{methods}
+}}
+"""
+
+EXCEPTIONS = [
+    "java.lang.IllegalArgumentException",
+    "java.lang.NullPointerException",
+    "java.lang.IllegalStateException",
+    "org.springframework.dao.DataIntegrityViolationException",
+]
+FRAMEWORK_FRAMES = [
+    "org.springframework.web.servlet.FrameworkServlet.service(FrameworkServlet.java:897)",
+    "jakarta.servlet.http.HttpServlet.service(HttpServlet.java:658)",
+    "org.apache.tomcat.util.threads.ThreadPoolExecutor$Worker.run(ThreadPoolExecutor.java:659)",
+]
+PLAIN_MESSAGES = [
+    "Connection pool exhausted while waiting for a connection",
+    "Request processing took longer than threshold",
+    "Failed to publish event to message broker",
+    "Cache refresh skipped because upstream returned 503",
+]
+
+
+# (package, class, method, 시작 줄) 목록과 함께 합성 Java 레포를 만들고 커밋
+def generate_java_repo(root: Path, files: int, methods_per_class: int, seed: int = 0) -> List[Tuple[str, str, str, int]]:
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    symbols = []
+    for file_index in range(files):
+        package = f"com.bench.module{file_index % 20}"
+        class_name = f"Service{file_index}"
+        methods, lines = [], CLASS_TEMPLATE.split("{methods}")[0].count("\n") + 1
+        for method_index in range(methods_per_class):
+            method = f"handle{rng.choice(['Order', 'Payment', 'Account', 'Refund'])}{method_index}"
+            return_type, return_value = rng.choice([("int", "amount * 2"), ("String", "id + amount"), ("boolean", "amount > 0")])
+            body = METHOD_TEMPLATE.format(class_name=class_name, method=method, return_type=return_type, return_value=return_value)
+            symbols.append((package, class_name, method, lines + 4))
+            lines += body.count("\n")
+            methods.append(body)
+        path = root / "src" / "main" / "java" / package.replace(".", "/") / f"{class_name}.java"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(CLASS_TEMPLATE.format(package=package, class_name=class_name, methods="".join(methods)), encoding="utf-8")
+
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    subprocess.run(["git", "add", "."], cwd=root, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-qm", "synthetic repo"],
+        cwd=root, check=True,
+    )
+    return symbols
+
+
+def _stack_trace_log(rng: random.Random, symbols: List[Tuple[str, str, str, int]], index: int) -> Dict[str, Any]:
+    package, class_name, method, line = rng.choice(symbols)
+    caller_package, caller_class, caller_method, caller_line = rng.choice(symbols)
+    exception = rng.choice(EXCEPTIONS)
+    stack_trace = "\n\t".join([
+        f"{exception}: request {rng.randint(1000, 99999)} failed",
+        f"at {package}.{class_name}.{method}({class_name}.java:{line})",
+        f"at {caller_package}.{caller_class}.{caller_method}({caller_class}.java:{caller_line})",
+        *(f"at {frame}" for frame in FRAMEWORK_FRAMES),
+    ])
+    return {
+        "timestamp": f"2025-05-01T10:{index // 60 % 60:02d}:{index % 60:02d}.{rng.randint(0, 999):03d}Z",
+        "level": "ERROR",
+        "thread": f"http-nio-8080-exec-{rng.randint(1, 200)}",
+        "logger": f"{package}.{class_name}",
+        "message": f"Unhandled exception in {method}",
+        "stackTrace": stack_trace,
+    }
+
+def _plain_log(rng: random.Random, index: int) -> Dict[str, Any]:
+    return {
+        "timestamp": f"2025-05-01T11:{index // 60 % 60:02d}:{index % 60:02d}Z",
+        "level": rng.choice(["ERROR", "WARN"]),
+        "traceId": f"{rng.getrandbits(64):016x}",
+        "message": f"{rng.choice(PLAIN_MESSAGES)} (elapsed {rng.randint(100, 9000)}ms)",
+    }
+
+# 요청 하나에 들어갈 로그 묶음 (unique_ratio만큼만 서로 다른 장애, 나머지는 반복)
+def generate_log_batch(rng: random.Random, symbols: List[Tuple[str, str, str, int]], size: int,
+                       stack_trace_ratio: float, unique_ratio: float) -> List[Dict[str, Any]]:
+    unique = max(1, int(size * unique_ratio))
+    templates = [
+        _stack_trace_log(rng, symbols, index) if rng.random() < stack_trace_ratio else _plain_log(rng, index)
+        for index in range(unique)
+    ]
+    logs = []
+    for index in range(size):
+        log = dict(templates[index % unique])
+        log["timestamp"] = f"2025-05-01T12:{index // 60 % 60:02d}:{index % 60:02d}Z"
+        logs.append(log)
+    return logs
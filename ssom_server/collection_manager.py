@@ -0,0 +1,168 @@
+import time
+from typing import Optional
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import (
+    Distance, VectorParams, PayloadSchemaType, HnswConfigDiff,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization, BinaryQuantizationConfig,
+    SearchParams, QuantizationSearchParams,
+    CreateAliasOperation, CreateAlias, DeleteAliasOperation, DeleteAlias,
+)
+from logging_utils import logger
+from settings import settings
+
+
+# 임베딩 모델별 기본 벡터 차원 (text-embedding-3-*는 EMBEDDING_DIMENSIONS로 줄일 수 있음)
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+
+def get_vector_size() -> int:
+    if settings.embedding_dimensions:
+        return settings.embedding_dimensions
+    if settings.embedding_model not in MODEL_DIMENSIONS:
+        raise ValueError(f"{settings.embedding_model} 모델의 벡터 차원을 알 수 없습니다. EMBEDDING_DIMENSIONS를 지정하세요.")
+    return MODEL_DIMENSIONS[settings.embedding_model]
+
+# scalar: float32 → int8 (메모리 1/4), binary: 1bit (메모리 1/32, 1024차원 이상에서 권장)
+def make_quantization_config(mode: str):
+    if mode == "scalar":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8, quantile=0.99, always_ram=settings.quantization_always_ram,
+        ))
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=settings.quantization_always_ram))
+    if mode == "none":
+        return None
+    raise ValueError(f"지원하지 않는 양자화 방식입니다: {mode} ({', '.join(QUANTIZATION_MODES)})")
+
+# 새 버전 컬렉션 생성 인자 (벡터 차원/저장 위치, HNSW 그래프, 양자화)
+# size/quantization은 리콜 측정 등에서 설정값 대신 쓸 때만 지정
+def get_collection_config(size: Optional[int] = None, quantization: Optional[str] = None) -> dict:
+    return {
+        "vectors_config": VectorParams(
+            size=size or get_vector_size(), distance=Distance.COSINE, on_disk=settings.vector_on_disk,
+        ),
+        "hnsw_config": HnswConfigDiff(
+            m=settings.hnsw_m, ef_construct=settings.hnsw_ef_construct, on_disk=settings.hnsw_on_disk,
+        ),
+        "quantization_config": make_quantization_config(quantization or settings.vector_quantization),
+    }
+
+# 벡터 검색 파라미터 (HNSW_EF가 0이면 Qdrant 기본값, 양자화 컬렉션은 oversampling만큼 더 가져와 원본 벡터로 재채점)
+def get_search_params(hnsw_ef: Optional[int] = None, rescore: Optional[bool] = None,
+                      oversampling: Optional[float] = None) -> SearchParams:
+    return SearchParams(
+        hnsw_ef=(hnsw_ef if hnsw_ef is not None else settings.hnsw_ef) or None,
+        quantization=QuantizationSearchParams(
+            rescore=rescore if rescore is not None else settings.quantization_rescore,
+            oversampling=oversampling if oversampling is not None else settings.quantization_oversampling,
+        ),
+    )
+
+# 컬렉션 구성이 바뀌면 (모델/차원/저장 방식) 증분 반영 대신 새 버전 컬렉션에 전체 인덱싱
+def get_vector_config_version() -> str:
+    return ":".join(str(value) for value in (
+        settings.embedding_model, get_vector_size(), settings.vector_quantization, settings.quantization_always_ram,
+        settings.vector_on_disk, settings.hnsw_on_disk, settings.hnsw_m, settings.hnsw_ef_construct,
+    ))
+
+
+# 레포(브랜치)별 검색 alias (레포마다 버전 컬렉션/롤백/정리가 따로 동작, Qdrant 이름에 쓰지 않는 "@"는 "."으로)
+def get_repo_alias(repo_name: str) -> str:
+    return f"{settings.collection_name}-{repo_name.replace('@', '.')}"
+
+# 버전 컬렉션 이름: "{alias}-v{생성시각(unix초)}"
+def make_version_name(alias: str) -> str:
+    return f"{alias}-v{int(time.time())}"
+
+def parse_version_time(alias: str, collection_name: str):
+    prefix = f"{alias}-v"
+    if not collection_name.startswith(prefix):
+        return None
+    version = collection_name.removeprefix(prefix)
+    return int(version) if version.isdigit() else None
+
+# alias에 속한 버전 컬렉션 목록 (오래된 순)
+def list_versions(qdrant: QdrantClient, alias: str) -> list:
+    names = [collection.name for collection in qdrant.get_collections().collections]
+    versions = [name for name in names if parse_version_time(alias, name) is not None]
+    return sorted(versions, key=lambda name: parse_version_time(alias, name))
+
+# alias가 가리키는 실제 컬렉션 이름 (alias가 없으면 None)
+def get_alias_target(qdrant: QdrantClient, alias: str):
+    for item in qdrant.get_aliases().aliases:
+        if item.alias_name == alias:
+            return item.collection_name
+    return None
+
+# 새 버전 컬렉션 생성
+def create_version_collection(qdrant: QdrantClient, alias: str) -> str:
+    collection_name = make_version_name(alias)
+    while qdrant.collection_exists(collection_name):
+        time.sleep(1)
+        collection_name = make_version_name(alias)
+    qdrant.create_collection(collection_name=collection_name, **get_collection_config())
+    qdrant.create_payload_index(collection_name, "metadata.path", PayloadSchemaType.KEYWORD)
+    # 스택 프레임 심볼 조회용
+    qdrant.create_payload_index(collection_name, "metadata.symbol", PayloadSchemaType.KEYWORD)
+    logger.info(f"새 버전 컬렉션 생성: {collection_name}")
+    return collection_name
+
+# alias를 새 컬렉션으로 원자적으로 전환
+def switch_alias(qdrant: QdrantClient, alias: str, collection_name: str):
+    # alias 이름으로 된 실제 컬렉션이 있으면 (alias 도입 이전 데이터) 먼저 제거
+    if get_alias_target(qdrant, alias) is None and qdrant.collection_exists(alias):
+        qdrant.delete_collection(alias)
+        logger.info(f"alias 전환을 위해 기존 단일 컬렉션 삭제: {alias}")
+
+    qdrant.update_collection_aliases(change_aliases_operations=[
+        DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)),
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=alias)),
+    ])
+    logger.info(f"alias 전환: {alias} -> {collection_name}")
+
+# 검색용 alias가 없으면 빈 버전 컬렉션을 만들어 연결
+def ensure_alias(qdrant: QdrantClient, alias: str) -> str:
+    target = get_alias_target(qdrant, alias)
+    if target is not None:
+        return target
+    if qdrant.collection_exists(alias):
+        # alias 도입 이전의 단일 컬렉션은 재인덱싱 전까지 그대로 사용
+        return alias
+    target = create_version_collection(qdrant, alias)
+    switch_alias(qdrant, alias, target)
+    return target
+
+# 직전 버전으로 되돌리기
+def rollback_alias(qdrant: QdrantClient, alias: str) -> str:
+    active = get_alias_target(qdrant, alias)
+    versions = list_versions(qdrant, alias)
+    if active not in versions or versions.index(active) == 0:
+        raise ValueError("되돌릴 이전 버전 컬렉션이 없습니다.")
+    previous = versions[versions.index(active) - 1]
+    switch_alias(qdrant, alias, previous)
+    return previous
+
+# 유예 기간이 지난 이전 버전 컬렉션 삭제
+# 각 버전의 교체 시각 = 다음 버전의 생성 시각, 활성 버전보다 새로운 버전(롤백된 버전)은 유지
+def garbage_collect_versions(qdrant: QdrantClient, alias: str) -> list:
+    active = get_alias_target(qdrant, alias)
+    versions = list_versions(qdrant, alias)
+    if active not in versions:
+        return []
+
+    now = time.time()
+    deleted = []
+    for previous, following in zip(versions, versions[1:]):
+        if versions.index(previous) >= versions.index(active):
+            break
+        retired_at = parse_version_time(alias, following)
+        if now - retired_at > settings.collection_retention_seconds:
+            qdrant.delete_collection(previous)
+            deleted.append(previous)
+            logger.info(f"유예 기간이 지난 컬렉션 삭제: {previous}")
+    return deleted
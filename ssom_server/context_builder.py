@@ -0,0 +1,152 @@
+import json
+import math
+from typing import Any, Dict, List, Tuple
+from langchain_core.documents import Document
+from log_normalizer import LogGroup, is_noise_key, parse_frame
+from token_utils import estimate_tokens
+from logging_utils import logger
+
+
+# 재정렬 가중치: 벡터 유사도 + 여러 로그에서 검색된 빈도 + 스택 프레임의 클래스/메소드 일치
+FREQUENCY_WEIGHT = 0.5
+SYMBOL_CLASS_WEIGHT = 0.7
+SYMBOL_METHOD_WEIGHT = 2.0
+# 로그 문자열 압축 기준 (긴 스택트레이스는 앞부분 줄만 유지)
+MAX_LOG_STRING_CHARS = 2000
+MAX_LOG_STRING_LINES = 15
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+
+def _doc_key(doc: Document) -> Tuple:
+    return doc.metadata.get("source"), doc.metadata.get("chunk_index"), doc.page_content
+
+# 스택 프레임의 (클래스, 메소드)별 가중치
+def _frame_symbols(log_groups: List[LogGroup]) -> Dict[Tuple[str, str], float]:
+    symbols = {}
+    for log_group in log_groups:
+        for position, frame in enumerate(log_group.frames):
+            qualified_class, method = parse_frame(frame)
+            # 스택 위쪽 프레임일수록 가중치를 높게
+            weight = 1 / (1 + 0.2 * position)
+            key = (qualified_class, method)
+            symbols[key] = max(symbols.get(key, 0.0), weight)
+    return symbols
+
+def _symbol_score(doc: Document, symbols: Dict[Tuple[str, str], float]) -> float:
+    metadata = doc.metadata
+    class_name = metadata.get("class_name")
+    if not class_name or not symbols:
+        return 0.0
+    qualified_class = ".".join(part for part in (metadata.get("package"), class_name) if part)
+    method = metadata.get("method")
+    score = 0.0
+    for (frame_class, frame_method), weight in symbols.items():
+        if frame_class != qualified_class and not frame_class.endswith(f".{class_name}"):
+            continue
+        if method and frame_method == method:
+            score = max(score, SYMBOL_METHOD_WEIGHT * weight)
+        else:
+            score = max(score, SYMBOL_CLASS_WEIGHT * weight)
+    return score
+
+# 모든 로그의 검색 결과를 합쳐 중복 제거 후 중요도 순으로 정렬
+def rerank_documents(results: List[List[Document]], log_groups: List[LogGroup]) -> List[Document]:
+    candidates: Dict[Tuple, Dict[str, Any]] = {}
+    for log_group, docs in zip(log_groups, results):
+        for doc in docs:
+            candidate = candidates.setdefault(_doc_key(doc), {"doc": doc, "dense": 0.0, "frequency": 0.0})
+            candidate["dense"] = max(candidate["dense"], float(doc.metadata.get("_score") or 0.0))
+            # 여러 로그(및 자주 발생한 로그)에서 검색될수록 가산
+            candidate["frequency"] += math.log1p(log_group.count)
+
+    if not candidates:
+        return []
+    symbols = _frame_symbols(log_groups)
+    max_frequency = max(candidate["frequency"] for candidate in candidates.values()) or 1.0
+    for candidate in candidates.values():
+        candidate["score"] = (
+            candidate["dense"]
+            + FREQUENCY_WEIGHT * candidate["frequency"] / max_frequency
+            + _symbol_score(candidate["doc"], symbols)
+        )
+    ranked = sorted(candidates.values(), key=lambda candidate: candidate["score"], reverse=True)
+    return [candidate["doc"] for candidate in ranked]
+
+def _compact_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _compact_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_compact_value(item) for item in value]
+    if isinstance(value, str):
+        lines = value.splitlines()
+        if len(lines) > MAX_LOG_STRING_LINES:
+            value = "\n".join(lines[:MAX_LOG_STRING_LINES]) + f"\n... ({len(lines) - MAX_LOG_STRING_LINES} lines omitted)"
+        if len(value) > MAX_LOG_STRING_CHARS:
+            value = value[:MAX_LOG_STRING_CHARS] + "... (truncated)"
+    return value
+
+# 로그를 압축된 JSON으로 (긴 문자열 축약, 예산 초과 시 발생 횟수가 적은 로그부터 생략)
+# 로그별 토큰 수를 한 번씩만 계산해 생략할 로그를 정하고, JSON 직렬화는 마지막에 한 번만 수행
+def build_log_question(log_groups: List[LogGroup], token_budget: int) -> str:
+    entries = []
+    for index, log_group in enumerate(log_groups):
+        # 첫 로그를 제외한 나머지는 타임스탬프/스레드 등 잡음 키 제거
+        log = log_group.log if index == 0 else {key: item for key, item in log_group.log.items() if not is_noise_key(key)}
+        entry = _compact_value(log)
+        if log_group.count > 1:
+            entry = {**entry, "occurrences": log_group.count}
+        # 배열 안에서 한 단계 더 들여쓰고 구분자(",\n")가 붙는 만큼 여유를 둠
+        tokens = estimate_tokens(json.dumps(entry, ensure_ascii=False, indent=1)) + 1
+        entries.append((log_group.count, index, entry, tokens))
+
+    # 배열 괄호와 생략 표시 항목
+    overhead = estimate_tokens(json.dumps([{"omitted_unique_logs": len(entries)}], ensure_ascii=False, indent=1))
+    used = overhead + sum(tokens for _, _, _, tokens in entries)
+    kept = set(range(len(entries)))
+    # 발생 횟수가 적은 로그부터, 같으면 뒤쪽 로그부터 생략
+    for count, index, _, tokens in sorted(entries, key=lambda item: (item[0], -item[1])):
+        if used <= token_budget or len(kept) <= 1:
+            break
+        kept.remove(index)
+        used -= tokens
+
+    while True:
+        ordered = [entry for _, index, entry, _ in entries if index in kept]
+        omitted = len(entries) - len(kept)
+        if omitted:
+            ordered.append({"omitted_unique_logs": omitted})
+        question = json.dumps(ordered, ensure_ascii=False, indent=1)
+        # 토큰 수는 항목별 합으로 추정했으므로 직렬화 결과가 예산을 넘으면 (드묾) 한 개씩 더 생략
+        if len(kept) <= 1 or estimate_tokens(question) <= token_budget:
+            return question
+        kept.remove(min(kept, key=lambda index: (entries[index][0], -index)))
+
+# 중요도 순으로 코드 청크를 예산 안에 채움
+def build_code_context(docs: List[Document], token_budget: int) -> Tuple[str, int, int]:
+    parts, used = [], 0
+    separator_tokens = estimate_tokens(CONTEXT_SEPARATOR)
+    for doc in docs:
+        tokens = estimate_tokens(doc.page_content) + (separator_tokens if parts else 0)
+        if used + tokens > token_budget:
+            continue
+        parts.append(doc.page_content)
+        used += tokens
+    return CONTEXT_SEPARATOR.join(parts), used, len(parts)
+
+# 프롬프트 타입별 토큰 예산 안에서 로그/코드 context 구성
+def build_prompt_context(results: List[List[Document]], log_groups: List[LogGroup],
+                         token_budget: int, log_token_ratio: float) -> Dict[str, str]:
+    question = build_log_question(log_groups, int(token_budget * log_token_ratio))
+    question_tokens = estimate_tokens(question)
+
+    ranked_docs = rerank_documents(results, log_groups)
+    context, context_tokens, packed = build_code_context(ranked_docs, max(0, token_budget - question_tokens))
+
+    logger.info(
+        f"프롬프트 구성: 로그 {question_tokens}토큰, 코드 {context_tokens}토큰 "
+        f"(청크 {packed}/{len(ranked_docs)}개), 예산 {token_budget}토큰"
+    )
+    return {
+        "context": context,
+        "question": question
+    }
@@ -0,0 +1,192 @@
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+from functools import lru_cache
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+from logging_utils import logger
+from settings import settings
+
+
+# 최대 크기 초과 시 한 번에 줄일 비율 (매 삽입마다 삭제하지 않도록 여유를 둠)
+EVICTION_RATIO = 0.1
+# 조회된 키의 last_used 갱신을 모아서 쓰는 개수 (조회마다 쓰기 트랜잭션을 만들지 않도록)
+TOUCH_FLUSH_SIZE = 256
+
+
+# 공백/유니코드 표기 차이를 무시하도록 정규화한 텍스트의 해시
+def make_cache_key(model: str, text: str) -> str:
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.sha256(f"{model}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+# (모델, 텍스트 해시) -> 벡터 SQLite 캐시, 최근 사용 순(LRU)으로 크기 제한
+class EmbeddingCache:
+    def __init__(self, path: str, max_entries: int):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 아직 반영하지 않은 last_used 갱신 (키 -> 마지막 조회 시각)
+        self._touched = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self.size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: List[str]) -> dict:
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            # SQLite 바인딩 변수 제한을 피하기 위해 나눠서 조회
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            now = time.time()
+            self._touched.update((key, now) for key in found)
+            if len(self._touched) >= TOUCH_FLUSH_SIZE:
+                self._flush_touched()
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, items: dict):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            # 같은 키는 같은 (모델, 텍스트)의 벡터이므로 이미 있으면 그대로 두고, 새로 추가된 수만큼 크기 증가
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()],
+            )
+            self.size += max(0, cursor.rowcount)
+            self._conn.commit()
+            if self.size > self.max_entries:
+                self._evict()
+
+    # 모아 둔 last_used 갱신을 한 트랜잭션으로 반영 (잠금을 잡은 상태에서 호출)
+    def _flush_touched(self):
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE key = ?",
+            [(last_used, key) for key, last_used in self._touched.items()],
+        )
+        self._conn.commit()
+        self._touched.clear()
+
+    def _evict(self):
+        # 최근 조회 기록을 먼저 반영해야 방금 쓴 벡터가 지워지지 않음
+        self._flush_touched()
+        target = int(self.max_entries * (1 - EVICTION_RATIO))
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (self.size - target,),
+        )
+        self._conn.commit()
+        logger.info(f"임베딩 캐시 정리: {self.size}개 -> {target}개")
+        self.size = target
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": self.size,
+            "max_entries": self.max_entries,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    if not settings.embedding_cache_enabled:
+        return None
+    return EmbeddingCache(settings.embedding_cache_path, settings.embedding_cache_max_entries)
+
+
+# 캐시 키에 쓰는 모델 이름 (EMBEDDING_DIMENSIONS로 차원을 줄인 벡터는 따로 저장)
+def get_model_cache_name() -> str:
+    if settings.embedding_dimensions:
+        return f"{settings.embedding_model}:{settings.embedding_dimensions}"
+    return settings.embedding_model
+
+
+# 임베딩 모델을 감싸 캐시에 없는 텍스트만 실제로 임베딩
+class CachedEmbeddings(Embeddings):
+    def __init__(self, embedding_model: Embeddings, model_name: str, cache: Optional[EmbeddingCache] = None):
+        self.embedding_model = embedding_model
+        self.model_name = model_name
+        self.cache = cache if cache is not None else get_embedding_cache()
+
+    # 캐시 조회 결과와 새로 임베딩할 텍스트 (같은 배치 안의 중복 텍스트는 한 번만 임베딩)
+    def _lookup(self, texts: List[str]):
+        keys = [make_cache_key(self.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        return keys, cached, missing
+
+    def _store(self, cached: dict, missing: dict, vectors: List[List[float]]):
+        computed = dict(zip(missing.keys(), vectors))
+        self.cache.put_many(computed)
+        cached.update(computed)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self.embedding_model.embed_documents(texts)
+
+        keys, cached, missing = self._lookup(texts)
+        if missing:
+            self._store(cached, missing, self.embedding_model.embed_documents(list(missing.values())))
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.cache is None:
+            return self.embedding_model.embed_query(text)
+
+        keys, cached, missing = self._lookup([text])
+        if missing:
+            self._store(cached, missing, [self.embedding_model.embed_query(text)])
+        return cached[keys[0]]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return await self.embedding_model.aembed_documents(texts)
+
+        # SQLite 조회/저장은 블로킹이고 인덱싱 스레드와 잠금을 공유하므로 이벤트 루프 밖에서 실행
+        keys, cached, missing = await asyncio.to_thread(self._lookup, texts)
+        if missing:
+            vectors = await self.embedding_model.aembed_documents(list(missing.values()))
+            await asyncio.to_thread(self._store, cached, missing, vectors)
+        return [cached[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.cache is None:
+            return await self.embedding_model.aembed_query(text)
+
+        keys, cached, missing = await asyncio.to_thread(self._lookup, [text])
+        if missing:
+            vector = await self.embedding_model.aembed_query(text)
+            await asyncio.to_thread(self._store, cached, missing, [vector])
+        return cached[keys[0]]
@@ -1,94 +1,350 @@
-import os
+import time
+import random
+import uuid
+import hashlib
 import subprocess
-import shutil
 from pathlib import Path
-from urllib.parse import urlparse
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue, FilterSelector, PointStruct
+import openai
 from langchain.docstore.document import Document
 from langchain_qdrant import QdrantVectorStore
 from langchain_openai import OpenAIEmbeddings
+from token_utils import estimate_tokens
+from repo_source import (
+    get_repo_name, get_clone_dir, sync_repository, list_source_files,
+    get_changed_java_files, iter_source_files, get_scope,
+)
+from index_state import load_index_state, update_index_state
+from exceptions import EmbeddingCancelled
+from embedding_cache import CachedEmbeddings, get_model_cache_name
+from metrics import track_stage, record_indexed_batch, observe_indexing
+from java_chunker import chunk_java_source, CHUNKER_VERSION
+from collection_manager import get_repo_alias, get_vector_config_version, create_version_collection, get_alias_target, switch_alias, garbage_collect_versions, list_versions
 from logging_utils import logger
 from settings import settings
 
 
-# 깃허브 URL에서 레포 이름 추출
-def get_repo_name(github_url: str) -> str:
-    path = urlparse(github_url).path
-    repo_name_with_git = os.path.basename(path)
-    repo_name = repo_name_with_git.removesuffix(".git")
-    return repo_name
-
-# github_repo 내부 모든 내용 삭제 함수
-def clean_github_repo_dir():
-    github_repo_root = Path("./github_repo")
-    if github_repo_root.exists() and github_repo_root.is_dir():
-        for item in github_repo_root.iterdir():
-            if item.is_dir():
-                shutil.rmtree(item)
-            else:
-                item.unlink()
-        logger.info(f"{github_repo_root} 내부 파일/폴더 삭제 완료")
-    else:
-        logger.info(f"{github_repo_root} 폴더가 존재하지 않아 삭제과정 스킵")
+# 임베딩 재시도 대상 오류와 백오프 설정
+RETRYABLE_EMBEDDING_ERRORS = (
+    openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError,
+)
+EMBEDDING_BACKOFF_BASE_SECONDS = 1.0
+EMBEDDING_BACKOFF_MAX_SECONDS = 60.0
+EMBEDDING_PROGRESS_LOG_INTERVAL = 10
+
+
+def check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise EmbeddingCancelled("임베딩 작업이 취소되었습니다.")
+
+
+# 파일 내용 해시
+def hash_content(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+# 경로 + 내용 해시 + 청크 순번 기반의 결정적 포인트 ID (재실행 시 동일 ID로 덮어씀)
+def make_point_id(path: str, content_hash: str, chunk_index: int) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{path}:{content_hash}:{chunk_index}"))
+
+# 파일을 클래스/메소드 단위 청크 Document로 변환
+def build_chunk_documents(file_path: Path, path: str, content: str, content_hash: str):
+    docs, ids = [], []
+    for chunk_index, chunk in enumerate(chunk_java_source(content, settings.chunk_max_chars)):
+        location = chunk.location() or path
+        docs.append(Document(
+            # 청크 위치를 본문 앞에 붙여 검색/프롬프트에서 출처를 알 수 있게 함
+            page_content=f"// {path} | {location} (L{chunk.start_line}-{chunk.end_line})\n{chunk.content}",
+            metadata={
+                "source": str(file_path),
+                "path": path,
+                "content_hash": content_hash,
+                "chunk_index": chunk_index,
+                "kind": chunk.kind,
+                "package": chunk.package,
+                "class_name": chunk.class_name,
+                "method": chunk.method,
+                "signature": chunk.signature,
+                "symbol": chunk.symbol(),
+                "start_line": chunk.start_line,
+                "end_line": chunk.end_line,
+            }
+        ))
+        ids.append(make_point_id(path, content_hash, chunk_index))
+    return docs, ids
+
+# 컬렉션에 저장된 파일별 내용 해시 조회
+def get_indexed_hashes(qdrant: QdrantClient, collection_name: str) -> dict:
+    indexed = {}
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=collection_name,
+            with_payload=["metadata.path", "metadata.content_hash"],
+            with_vectors=False,
+            limit=1000,
+            offset=offset,
+        )
+        for point in points:
+            metadata = (point.payload or {}).get("metadata", {})
+            if "path" in metadata:
+                indexed.setdefault(metadata["path"], set()).add(metadata.get("content_hash"))
+        if offset is None:
+            return indexed
+
+# 특정 파일의 포인트 삭제 (keep_hash가 있으면 해당 버전은 유지)
+def delete_file_points(qdrant: QdrantClient, collection_name: str, path: str, keep_hash: str = None):
+    must_not = [FieldCondition(key="metadata.content_hash", match=MatchValue(value=keep_hash))] if keep_hash else None
+    qdrant.delete(
+        collection_name=collection_name,
+        points_selector=FilterSelector(filter=Filter(
+            must=[FieldCondition(key="metadata.path", match=MatchValue(value=path))],
+            must_not=must_not,
+        )),
+    )
 
-# 벡터 임베딩 처리 함수
-def embed_documents(github_url: str):
-    # github_repo 내부 정리
-    clean_github_repo_dir()
+# 벡터 임베딩 처리 함수 (변경된 파일만 증분 반영)
+# on_progress: 단계 전환/배치 upsert 때마다 진행 상황 스냅샷(새 dict)을 받는 콜백
+# cancel_event: set되면 다음 단계/배치 경계에서 중단
+def embed_documents(github_url: str, branch: Optional[str] = None,
+                    on_progress: Optional[Callable[[dict], None]] = None, cancel_event=None) -> dict:
+    # 진행 상황은 이 작업 스레드만 수정하고, 밖으로는 일관된 시점의 복사본만 넘김
+    progress = {}
+
+    def publish(**values):
+        progress.update(values)
+        if on_progress is not None:
+            on_progress(dict(progress))
+
+    publish(stage="sync")
+    started_at = time.monotonic()
 
     # 경로 생성
-    repo_name = get_repo_name(github_url)
-    clone_dir = f"./github_repo/{repo_name}"
+    repo_name = get_repo_name(github_url, branch)
+    clone_dir = get_clone_dir(repo_name)
 
-    # 깃허브 레포 클론
-    subprocess.run(["git", "clone", github_url, clone_dir], check=True)
-    logger.info(f"GitHub 레포지토리 클론 완료: {github_url}")
+    # 깃허브 레포 클론 또는 fetch (레포/브랜치별 디렉토리)
+    head_commit = sync_repository(github_url, clone_dir, branch, cancel_event)
 
-    # .java 파일 탐색
-    java_files = list(Path(clone_dir).rglob("*.java"))
+    # 인덱싱 대상 .java 파일 탐색 (include/exclude glob)
+    java_files = list_source_files(clone_dir)
     if not java_files:
         logger.error(".java 파일이 없음")
         for path in Path(clone_dir).rglob("*"):
             logger.info(f"디렉토리 탐색 중: {path}")
         raise ValueError(".java 파일이 없습니다.")
     logger.info(f"{len(java_files)}개의 .java 파일을 찾음")
+    check_cancelled(cancel_event)
 
-    # Qdrant 연결
+    # Qdrant 연결 (레포별 alias에 인덱싱해서 다른 레포의 인덱스는 그대로 유지)
     qdrant = QdrantClient(host=settings.qdrant_host, port=settings.qdrant_port)
+    alias = get_repo_alias(repo_name)
+    active_collection = get_alias_target(qdrant, alias)
 
-    # 기존 컬렉션 삭제 및 재생성
-    if qdrant.collection_exists(settings.collection_name):
-        qdrant.delete_collection(collection_name=settings.collection_name)
-        logger.info(f"기존 컬렉션 삭제: {settings.collection_name}")
-
-    qdrant.create_collection(
-        collection_name=settings.collection_name,
-        vectors_config=VectorParams(size=1536, distance=Distance.COSINE),
+    # 같은 레포가 활성 컬렉션에 인덱싱되어 있으면 증분 반영, 아니면 새 버전 컬렉션에 전체 인덱싱 후 alias 전환
+    repo_state = load_index_state().get(repo_name, {})
+    last_commit = repo_state.get("commit")
+    incremental = (
+        active_collection is not None
+        and repo_state.get("github_url") == github_url
+        and repo_state.get("collection") == active_collection
+        and repo_state.get("chunker") == CHUNKER_VERSION
+        and repo_state.get("vectors") == get_vector_config_version()
     )
-    logger.info(f"새 컬렉션 생성: {settings.collection_name}")
 
-    # 임베딩 모델 초기화
-    embedding_model = OpenAIEmbeddings(
-        model=settings.embedding_model
-    )
+    if incremental:
+        target_collection = active_collection
+        indexed = get_indexed_hashes(qdrant, target_collection)
+        try:
+            if repo_state.get("scope") != get_scope():
+                raise ValueError("인덱싱 범위 변경")
+            if not last_commit:
+                raise ValueError("롤백한 컬렉션의 인덱싱 커밋을 알 수 없음")
+            candidates, deleted = get_changed_java_files(clone_dir, last_commit, head_commit)
+            logger.info(f"{last_commit[:7]}..{head_commit[:7]} 변경 파일 {len(candidates)}개, 삭제 파일 {len(deleted)}개")
+        except (subprocess.CalledProcessError, ValueError) as e:
+            logger.warning(f"마지막 인덱싱 커밋과 비교할 수 없어 전체 비교로 진행: {last_commit} ({e})")
+            candidates, deleted = sorted(java_files), sorted(set(indexed) - java_files)
+    else:
+        target_collection = create_version_collection(qdrant, alias)
+        indexed = {}
+        candidates, deleted = sorted(java_files), []
 
-    # Document 객체 생성
-    docs = []
-    for file_path in java_files:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        docs.append(Document(
-            page_content=content,
-            metadata={"source": str(file_path)}
-        ))
+    publish(stage="embedding", candidates=len(candidates))
+    try:
+        summary = index_files(
+            qdrant, target_collection, clone_dir, java_files, candidates, deleted, indexed,
+            progress, cancel_event, publish,
+        )
+    except Exception:
+        # 전환 전 실패/취소된 새 버전 컬렉션은 정리 (검색 중인 활성 컬렉션은 그대로 유지)
+        if not incremental:
+            qdrant.delete_collection(target_collection)
+        raise
+
+    if not incremental:
+        switch_alias(qdrant, alias, target_collection)
+    garbage_collect_versions(qdrant, alias)
+    # 버전 컬렉션별 마지막 인덱싱 커밋/청크 분할/벡터 설정 (롤백 시 상태 복원용, 삭제된 버전은 제외)
+    versions = {
+        **repo_state.get("versions", {}),
+        target_collection: {"commit": head_commit, "chunker": CHUNKER_VERSION, "vectors": get_vector_config_version()},
+    }
+    existing = set(list_versions(qdrant, alias))
+
+    update_index_state(repo_name, {
+        "github_url": github_url,
+        "branch": branch,
+        "alias": alias,
+        "commit": head_commit,
+        "collection": target_collection,
+        "chunker": CHUNKER_VERSION,
+        "vectors": get_vector_config_version(),
+        "scope": get_scope(),
+        "indexed_at": time.time(),
+        "versions": {collection_name: version for collection_name, version in versions.items() if collection_name in existing},
+    })
+
+    publish(stage="done")
+    observe_indexing("incremental" if incremental else "full", time.monotonic() - started_at)
+    summary["commit"] = head_commit
+    summary["collection"] = target_collection
+    logger.info(f".java 파일 Qdrant 저장 완료: {summary}")
+    return summary
+
+# 변경된 파일의 청크를 파일 단위로 읽어 하나씩 생성 (레포 전체를 메모리에 올리지 않음)
+# 파일 읽기는 스레드 풀에서 미리 수행, 크기 초과/바이너리 파일은 건너뜀
+# 바뀐 파일이 없으면 배치가 만들어지지 않으므로 파일마다 취소 여부 확인
+def iter_changed_chunks(clone_dir: str, java_files: set, candidates: list, indexed: dict, stats: dict, replaced: list,
+                        cancel_event=None):
+    paths = [path for path in candidates if path in java_files]
+    for path, content in iter_source_files(clone_dir, paths):
+        check_cancelled(cancel_event)
+        if content is None:
+            stats["ignored"] += 1
+            continue
+        file_path = Path(clone_dir) / path
+        content_hash = hash_content(content)
+        if indexed.get(path) == {content_hash}:
+            stats["skipped"] += 1
+            continue
+        stats["files"] += 1
+        if path in indexed:
+            replaced.append((path, content_hash))
+        docs, ids = build_chunk_documents(file_path, path, content, content_hash)
+        yield from zip(docs, ids)
+
+# 토큰 예산과 최대 개수 기준으로 청크 배치 구성
+def iter_batches(chunks, max_tokens: int, max_size: int):
+    batch, batch_tokens = [], 0
+    for doc, point_id in chunks:
+        tokens = estimate_tokens(doc.page_content)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_size):
+            yield batch, batch_tokens
+            batch, batch_tokens = [], 0
+        batch.append((doc, point_id))
+        batch_tokens += tokens
+    if batch:
+        yield batch, batch_tokens
 
-    # Qdrant에 저장
-    vectorstore = QdrantVectorStore(
-        client=qdrant,
-        embedding=embedding_model,
-        collection_name=settings.collection_name
+# 429/일시적 오류는 지수 백오프(+지터)로 재시도하며 임베딩
+def embed_with_backoff(embedding_model, texts: list) -> list:
+    for attempt in range(settings.embedding_max_retries + 1):
+        try:
+            return embedding_model.embed_documents(texts)
+        except RETRYABLE_EMBEDDING_ERRORS as e:
+            if attempt == settings.embedding_max_retries:
+                raise
+            delay = min(EMBEDDING_BACKOFF_MAX_SECONDS, EMBEDDING_BACKOFF_BASE_SECONDS * 2 ** attempt)
+            delay = delay / 2 + random.uniform(0, delay / 2)
+            logger.warning(f"임베딩 요청 재시도 {attempt + 1}/{settings.embedding_max_retries} ({delay:.1f}초 후): {e}")
+            time.sleep(delay)
+
+def embed_batch(embedding_model, batch: list) -> list:
+    with track_stage("index_embedding"):
+        vectors = embed_with_backoff(embedding_model, [doc.page_content for doc, _ in batch])
+    return [
+        PointStruct(
+            id=point_id,
+            vector=vector,
+            payload={
+                QdrantVectorStore.CONTENT_KEY: doc.page_content,
+                QdrantVectorStore.METADATA_KEY: doc.metadata,
+            },
+        )
+        for (doc, point_id), vector in zip(batch, vectors)
+    ]
+
+# 변경된 파일만 임베딩해 대상 컬렉션에 반영
+# 배치 단위로 동시에 최대 embedding_concurrency개의 임베딩 요청을 보내고, 끝나는 대로 upsert
+# publish: 배치 upsert 후 stats 스냅샷을 내보내는 함수
+def index_files(qdrant: QdrantClient, collection_name: str, clone_dir: str,
+                java_files: set, candidates: list, deleted: list, indexed: dict,
+                stats: dict, cancel_event=None, publish: Optional[Callable[[], None]] = None) -> dict:
+    stats.update({"files": 0, "skipped": 0, "ignored": 0, "chunks": 0, "tokens": 0, "batches": 0})
+    replaced = []
+    chunks = iter_changed_chunks(clone_dir, java_files, candidates, indexed, stats, replaced, cancel_event)
+    batches = iter_batches(chunks, settings.embedding_batch_tokens, settings.embedding_batch_size)
+
+    # 임베딩 모델 초기화 (내용이 같은 청크는 캐시에서 가져옴)
+    embedding_model = CachedEmbeddings(
+        OpenAIEmbeddings(model=settings.embedding_model, dimensions=settings.embedding_dimensions or None),
+        get_model_cache_name(),
     )
-    vectorstore.add_documents(docs)
+    started_at = time.monotonic()
+
+    def upsert_completed(futures):
+        for future in futures:
+            points, batch_tokens = future.result(), in_flight.pop(future)
+            with track_stage("index_upsert"):
+                qdrant.upsert(collection_name=collection_name, points=points)
+            record_indexed_batch(len(points), batch_tokens)
+            stats["chunks"] += len(points)
+            stats["tokens"] += batch_tokens
+            stats["batches"] += 1
+            if publish is not None:
+                publish()
+            if stats["batches"] % EMBEDDING_PROGRESS_LOG_INTERVAL == 0:
+                elapsed = time.monotonic() - started_at
+                logger.info(
+                    f"임베딩 진행: 파일 {stats['files']}개, 청크 {stats['chunks']}개, "
+                    f"토큰 {stats['tokens']}개, {stats['chunks'] / elapsed:.1f} 청크/초"
+                )
 
-    logger.info("모든 .java 파일 Qdrant에 저장 완료")
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=settings.embedding_concurrency) as executor:
+        try:
+            for batch, batch_tokens in batches:
+                check_cancelled(cancel_event)
+                # 진행 중인 요청 수를 제한해 메모리 사용량을 일정하게 유지
+                if len(in_flight) >= settings.embedding_concurrency:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    upsert_completed(done)
+                in_flight[executor.submit(embed_batch, embedding_model, batch)] = batch_tokens
+            upsert_completed(list(in_flight))
+        except Exception:
+            for future in in_flight:
+                future.cancel()
+            raise
+
+    # 새 버전 저장 후 이전 버전/삭제된 파일 포인트 정리
+    for path, content_hash in replaced:
+        delete_file_points(qdrant, collection_name, path, keep_hash=content_hash)
+    for path in deleted:
+        if path in indexed:
+            delete_file_points(qdrant, collection_name, path)
+
+    elapsed = time.monotonic() - started_at
+    logger.info(
+        f"임베딩 완료: 파일 {stats['files']}개, 청크 {stats['chunks']}개, 배치 {stats['batches']}개, "
+        f"토큰 {stats['tokens']}개, {elapsed:.1f}초"
+    )
+    return {
+        "embedded": stats["files"],
+        "chunks": stats["chunks"],
+        "skipped": stats["skipped"],
+        "ignored": stats["ignored"],
+        "deleted": len([path for path in deleted if path in indexed]),
+    }
@@ -8,6 +8,18 @@ class CustomException(Exception):
         self.message = message
         self.status_code = status_code
 
+# 시작 시 초기화(Qdrant 연결, 모델/체인 생성)가 아직 끝나지 않음
+class ServiceNotReadyError(Exception):
+    pass
+
+# 임베딩 작업 취소 요청으로 중단됨
+class EmbeddingCancelled(Exception):
+    pass
+
+# LLM이 유효한 응답을 주지 못함 (재시도/대체 모델까지 모두 실패하거나, 재요청 후에도 출력 형식과 맞지 않음)
+class LLMResponseError(Exception):
+    pass
+
 # FastAPI exception handler
 async def custom_exception_handler(request: Request, exc: CustomException):
     return JSONResponse(
@@ -0,0 +1,82 @@
+import json
+import time
+import threading
+from typing import Optional, Tuple
+from repo_source import GITHUB_REPO_ROOT, parse_repo_id
+from logging_utils import logger
+from settings import settings
+
+
+# 레포별 마지막 인덱싱 커밋 기록 파일 (여러 레포 작업이 동시에 갱신하므로 잠금 후 다시 읽어서 저장)
+INDEX_STATE_PATH = GITHUB_REPO_ROOT / ".index_state.json"
+_index_state_lock = threading.Lock()
+
+
+def load_index_state() -> dict:
+    if not INDEX_STATE_PATH.exists():
+        return {}
+    try:
+        return json.loads(INDEX_STATE_PATH.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        logger.warning(f"인덱싱 상태 파일을 읽을 수 없어 전체 비교로 진행: {INDEX_STATE_PATH}")
+        return {}
+
+# 요청마다 읽는 인덱싱 상태 (상태 파일이 바뀔 때만 다시 읽음)
+_index_state_cache = {"mtime": None, "state": {}}
+
+def get_index_state() -> dict:
+    try:
+        mtime = INDEX_STATE_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if _index_state_cache["mtime"] != mtime:
+        _index_state_cache["state"] = load_index_state()
+        _index_state_cache["mtime"] = mtime
+    return _index_state_cache["state"]
+
+# 분석 요청의 레포 식별자를 (검색할 alias, 인덱스 버전)으로 변환 (인덱스 버전은 재인덱싱마다 바뀌며 응답 캐시 키에 사용)
+# repo를 생략하면 DEFAULT_REPO, 그것도 없으면 인덱싱한 레포가 하나일 때만 그 레포 (없으면 기본 alias)
+# 여러 레포가 인덱싱되어 있으면 다른 레포의 코드로 분석하지 않도록 repo를 요구
+def resolve_repo(repo: Optional[str] = None) -> Tuple[str, str]:
+    state = get_index_state()
+    repo = repo or settings.default_repo
+    if repo:
+        repo_state = state.get(parse_repo_id(repo))
+        if not repo_state or "alias" not in repo_state:
+            raise ValueError(f"인덱싱되지 않은 레포입니다: {repo}")
+    else:
+        indexed = [repo_state for repo_state in state.values() if "alias" in repo_state]
+        if not indexed:
+            return settings.collection_name, settings.collection_name
+        if len(indexed) > 1:
+            raise ValueError("여러 레포가 인덱싱되어 있어 repo 파라미터(owner/repo 또는 owner/repo@branch)가 필요합니다.")
+        repo_state = indexed[0]
+    return repo_state["alias"], f"{repo_state['collection']}@{repo_state['commit']}"
+
+def save_index_state(state: dict):
+    INDEX_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = INDEX_STATE_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp_path.replace(INDEX_STATE_PATH)
+
+def update_index_state(repo_name: str, repo_state: dict):
+    with _index_state_lock:
+        state = load_index_state()
+        state[repo_name] = repo_state
+        save_index_state(state)
+
+# 롤백으로 alias가 가리키게 된 컬렉션과 그 컬렉션의 마지막 인덱싱 커밋/청크 분할/벡터 설정을 기록
+# (인덱스 버전이 바뀌어 응답 캐시가 롤백 전 결과를 재사용하지 않고, 다음 증분 인덱싱도 그 컬렉션 기준으로 비교)
+# 기록이 없는 컬렉션이면 커밋을 비워 다음 인덱싱 때 전체 비교
+def record_rollback(alias: str, collection_name: str):
+    with _index_state_lock:
+        state = load_index_state()
+        for repo_state in state.values():
+            if repo_state.get("alias") == alias:
+                version = repo_state.get("versions", {}).get(collection_name, {})
+                repo_state["collection"] = collection_name
+                repo_state["commit"] = version.get("commit")
+                repo_state["chunker"] = version.get("chunker")
+                repo_state["vectors"] = version.get("vectors")
+                repo_state["indexed_at"] = time.time()
+        save_index_state(state)
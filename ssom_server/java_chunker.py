@@ -0,0 +1,276 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+# 청킹 방식이 바뀌면 올려서 기존 인덱스를 전체 재생성하도록 함
+CHUNKER_VERSION = "2"
+
+TYPE_PATTERN = re.compile(r"(?<![\w.])(class|interface|enum|record|@interface)\s+([A-Za-z_$][\w$]*)")
+METHOD_PATTERN = re.compile(r"([A-Za-z_$][\w$]*)\s*\(")
+ANNOTATION_PATTERN = re.compile(r"@(?!interface\b)[\w.]+\s*(\((?:[^()]|\([^()]*\))*\))?")
+PACKAGE_PATTERN = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.MULTILINE)
+NON_METHOD_KEYWORDS = {
+    "if", "for", "while", "switch", "catch", "synchronized", "try", "else", "do",
+    "return", "new", "throw", "case", "default", "assert", "finally",
+}
+OVERSIZE_OVERLAP_LINES = 5
+
+
+@dataclass
+class JavaChunk:
+    kind: str                   # "class" | "method" | "file"
+    content: str
+    start_line: int             # 1부터 시작, 끝 줄 포함
+    end_line: int
+    package: str = ""
+    class_name: str = ""        # 중첩 클래스는 "Outer.Inner"
+    method: str = ""
+    signature: str = ""
+
+    def location(self) -> str:
+        qualified = ".".join(part for part in (self.package, self.class_name) if part)
+        if self.method:
+            return f"{qualified}#{self.method}"
+        return qualified
+
+    # 스택 프레임에서 바로 찾을 수 있는 심볼 (메소드 청크는 "패키지.클래스#메소드", 클래스 청크는 "패키지.클래스")
+    def symbol(self) -> str:
+        return self.location() if self.class_name else ""
+
+
+@dataclass
+class _Block:
+    kind: str
+    name: str
+    header_start: int
+    body_start: int
+    depth: int
+    signature: str = ""
+    end: int = -1
+    parent: Optional["_Block"] = None
+
+
+# 주석/문자열/문자 리터럴을 공백으로 바꾼 사본 (길이와 줄바꿈은 유지)
+def mask_source(source: str) -> str:
+    masked = list(source)
+    i, n = 0, len(source)
+
+    def blank(start: int, end: int):
+        for k in range(start, min(end, n)):
+            if masked[k] != "\n":
+                masked[k] = " "
+
+    while i < n:
+        if source.startswith("//", i):
+            end = source.find("\n", i)
+            end = n if end == -1 else end
+            blank(i, end)
+            i = end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            blank(i, end)
+            i = end
+        elif source.startswith('"""', i):
+            end = source.find('"""', i + 3)
+            end = n if end == -1 else end + 3
+            blank(i + 1, end - 1)
+            i = end
+        elif source[i] in "\"'":
+            quote = source[i]
+            k = i + 1
+            while k < n and source[k] != quote and source[k] != "\n":
+                k += 2 if source[k] == "\\" else 1
+            blank(i + 1, k)
+            i = k + 1
+        else:
+            i += 1
+    return "".join(masked)
+
+# 문장 경계(; { })부터 현재 위치까지의 선언부 시작 위치
+def _header_start(masked: str, brace_pos: int) -> int:
+    k = brace_pos - 1
+    paren_depth = 0
+    while k >= 0:
+        char = masked[k]
+        if char == ")":
+            paren_depth += 1
+        elif char == "(":
+            paren_depth -= 1
+        elif char in ";{}" and paren_depth <= 0:
+            break
+        k -= 1
+    start = k + 1
+    while start < brace_pos and masked[start].isspace():
+        start += 1
+    return start
+
+def _classify(header: str, parent: Optional[_Block]):
+    flat = " ".join(header.split())
+    # 어노테이션을 뺀 선언부 (시그니처로 저장)
+    declaration = " ".join(ANNOTATION_PATTERN.sub(" ", flat).split()).replace("( ", "(")
+    type_match = TYPE_PATTERN.search(flat)
+    if type_match and not re.search(r"\bnew\b", flat[:type_match.start()]):
+        return "class", type_match.group(2), declaration
+
+    # 메소드/생성자는 클래스 본문 바로 아래에서만 인정
+    if parent is None or parent.kind != "class" or "=" in declaration.split("(")[0] or "->" in declaration:
+        return None, "", flat
+    method_match = METHOD_PATTERN.search(declaration)
+    if not method_match:
+        return None, "", flat
+    name = method_match.group(1)
+    before = declaration[:method_match.start()].strip()
+    if name in NON_METHOD_KEYWORDS or "," in before.split("<")[0]:
+        return None, "", flat
+    # 반환 타입이 없으면 생성자여야 함 (enum 상수 본문 등 제외)
+    if not before and name != parent.name:
+        return None, "", flat
+    return "method", name, declaration
+
+def _find_blocks(masked: str) -> Optional[List[_Block]]:
+    blocks, stack = [], []
+    for pos, char in enumerate(masked):
+        if char == "{":
+            parent = next((block for block in reversed(stack) if block.kind != "other"), None)
+            direct_parent = stack[-1] if stack else None
+            header_start = _header_start(masked, pos)
+            kind, name, signature = _classify(masked[header_start:pos], direct_parent)
+            block = _Block(
+                kind=kind or "other", name=name, header_start=header_start,
+                body_start=pos, depth=len(stack), signature=signature,
+                parent=parent if kind else None,
+            )
+            stack.append(block)
+            if kind:
+                blocks.append(block)
+        elif char == "}":
+            if not stack:
+                return None
+            stack.pop().end = pos
+    if stack:
+        return None
+    return blocks
+
+def _line_of(line_starts: List[int], pos: int) -> int:
+    lo, hi = 0, len(line_starts) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if line_starts[mid] <= pos:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo + 1
+
+# 선언 바로 위의 Javadoc/주석 줄까지 청크 시작을 확장
+def _extend_to_comments(lines: List[str], start_line: int) -> int:
+    line = start_line
+    while line > 1:
+        previous = lines[line - 2].strip()
+        if previous.startswith(("/**", "/*", "*", "//", "@")) or previous.endswith("*/"):
+            line -= 1
+        else:
+            break
+    return line
+
+def _qualified_class_name(block: _Block) -> str:
+    names = []
+    while block is not None:
+        if block.kind == "class":
+            names.append(block.name)
+        block = block.parent
+    return ".".join(reversed(names))
+
+# 너무 긴 청크는 줄 단위 창으로 나눔 (창 사이에 몇 줄씩 겹침)
+def _split_lines(template: JavaChunk, numbered_lines: List[tuple], max_chars: int) -> List[JavaChunk]:
+    parts = []
+    start = 0
+    while start < len(numbered_lines):
+        size, end = 0, start
+        while end < len(numbered_lines) and (size == 0 or size + len(numbered_lines[end][1]) + 1 <= max_chars):
+            size += len(numbered_lines[end][1]) + 1
+            end += 1
+        window = numbered_lines[start:end]
+        parts.append(JavaChunk(
+            kind=template.kind,
+            content="\n".join(text for _, text in window)[:max_chars],
+            start_line=window[0][0], end_line=window[-1][0],
+            package=template.package, class_name=template.class_name,
+            method=template.method, signature=template.signature,
+        ))
+        if end >= len(numbered_lines):
+            break
+        start = max(end - min(OVERSIZE_OVERLAP_LINES, (end - start) // 2), start + 1)
+    return parts
+
+# Java 소스를 클래스/메소드 경계로 분할
+def chunk_java_source(source: str, max_chars: int = 4000) -> List[JavaChunk]:
+    lines = source.splitlines()
+    if not lines:
+        return []
+    masked = mask_source(source)
+    package_match = PACKAGE_PATTERN.search(masked)
+    package = package_match.group(1) if package_match else ""
+
+    blocks = _find_blocks(masked)
+    if not blocks:
+        # 중괄호 짝이 맞지 않거나 선언을 찾지 못하면 파일 단위로 분할
+        whole_file = JavaChunk(kind="file", content="", start_line=1, end_line=len(lines), package=package)
+        return _split_lines(whole_file, list(enumerate(lines, 1)), max_chars)
+
+    line_starts = [0]
+    for index, char in enumerate(source):
+        if char == "\n":
+            line_starts.append(index + 1)
+
+    # (청크 정보, 청크에 포함될 (줄 번호, 내용) 목록)
+    pending = []
+    covered = set()
+    for block in blocks:
+        if block.kind != "method":
+            continue
+        start_line = _extend_to_comments(lines, _line_of(line_starts, block.header_start))
+        end_line = _line_of(line_starts, block.end)
+        template = JavaChunk(
+            kind="method", content="", start_line=start_line, end_line=end_line,
+            package=package, class_name=_qualified_class_name(block.parent),
+            method=block.name, signature=block.signature,
+        )
+        pending.append((template, [(line, lines[line - 1]) for line in range(start_line, end_line + 1)]))
+        covered.update(range(start_line, end_line + 1))
+
+    # 클래스 청크: 메소드 본문을 제외한 선언부/필드 (중첩 클래스는 각자 청크로)
+    class_blocks = [block for block in blocks if block.kind == "class"]
+    nested_ranges = {}
+    for block in class_blocks:
+        if block.parent is not None:
+            start_line = _extend_to_comments(lines, _line_of(line_starts, block.header_start))
+            nested_ranges.setdefault(id(block.parent), []).append((start_line, _line_of(line_starts, block.end)))
+
+    for index, block in enumerate(class_blocks):
+        if index == 0:
+            start_line = 1  # 첫 클래스 청크에는 package/import 포함
+        else:
+            start_line = _extend_to_comments(lines, _line_of(line_starts, block.header_start))
+        end_line = _line_of(line_starts, block.end)
+        excluded = set(covered)
+        for nested_start, nested_end in nested_ranges.get(id(block), []):
+            excluded.update(range(nested_start, nested_end + 1))
+        kept = [
+            (line, lines[line - 1]) for line in range(start_line, end_line + 1)
+            if line not in excluded and lines[line - 1].strip()
+        ]
+        if not kept:
+            continue
+        template = JavaChunk(
+            kind="class", content="", start_line=start_line, end_line=end_line,
+            package=package, class_name=_qualified_class_name(block),
+            signature=block.signature,
+        )
+        pending.append((template, kept))
+
+    chunks = []
+    for template, numbered_lines in sorted(pending, key=lambda item: (item[0].start_line, item[0].kind != "class")):
+        chunks.extend(_split_lines(template, numbered_lines, max_chars))
+    return chunks
@@ -0,0 +1,134 @@
+import time
+import uuid
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from repo_source import get_repo_name
+from logging_utils import logger
+from settings import settings
+
+
+# 완료된 작업 기록은 최근 것만 보관
+MAX_FINISHED_JOBS = 100
+ACTIVE_STATUSES = ("queued", "running")
+
+
+@dataclass
+class EmbeddingJob:
+    id: str
+    github_url: str
+    repo_name: str
+    branch: Optional[str] = None
+    status: str = "queued"       # queued | running | succeeded | failed | cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, Any] = field(default_factory=dict)
+    summary: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    future: Optional[Future] = None
+
+    # 작업 스레드가 보낸 진행 상황 스냅샷으로 교체 (스냅샷은 이후 수정하지 않으므로 조회 쪽은 잠금 없이 읽음)
+    def publish_progress(self, progress: Dict[str, Any]):
+        self.progress = progress
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        progress = self.progress
+        chunks = progress.get("chunks", 0)
+        return {
+            "jobId": self.id,
+            "githubUrl": self.github_url,
+            "branch": self.branch,
+            "repo": self.repo_name,
+            "status": self.status,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "elapsedSeconds": round(elapsed, 2) if elapsed is not None else None,
+            "progress": progress,
+            "chunksPerSecond": round(chunks / elapsed, 2) if elapsed else None,
+            "summary": self.summary,
+            "error": self.error,
+        }
+
+
+# 임베딩 작업을 워커 스레드에서 실행하고 상태/진행률/취소를 관리
+class EmbeddingJobManager:
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embedding-job")
+        self._jobs: "OrderedDict[str, EmbeddingJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # 같은 레포(브랜치)의 작업이 대기/실행 중이면 새로 만들지 않고 기존 작업을 반환 (single-flight)
+    def submit(self, github_url: str, branch: Optional[str] = None):
+        repo_name = get_repo_name(github_url, branch)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.repo_name == repo_name and job.status in ACTIVE_STATUSES:
+                    return job, False
+            job = EmbeddingJob(id=uuid.uuid4().hex, github_url=github_url, repo_name=repo_name, branch=branch)
+            self._jobs[job.id] = job
+            self._prune()
+            job.future = self._executor.submit(self._run, job)
+        logger.info(f"임베딩 작업 등록: {job.id} ({github_url})")
+        return job, True
+
+    def get(self, job_id: str) -> Optional[EmbeddingJob]:
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> Optional[EmbeddingJob]:
+        job = self._jobs.get(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return job
+        job.cancel_event.set()
+        # 아직 시작 전이면 바로 취소, 실행 중이면 다음 배치 경계에서 중단
+        if job.future is not None and job.future.cancel():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        logger.info(f"임베딩 작업 취소 요청: {job.id}")
+        return job
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            if job.status in ACTIVE_STATUSES:
+                job.cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: EmbeddingJob):
+        # 임베딩 파이프라인(qdrant/openai/langchain)은 첫 작업 때 import (서버 시작 시간 단축)
+        from embedding_service import embed_documents, EmbeddingCancelled
+
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.summary = embed_documents(
+                job.github_url, branch=job.branch, on_progress=job.publish_progress, cancel_event=job.cancel_event,
+            )
+            job.status = "succeeded"
+        except EmbeddingCancelled:
+            job.status = "cancelled"
+            logger.info(f"임베딩 작업 취소됨: {job.id}")
+        except Exception as e:
+            traceback.print_exc()
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+
+job_manager = EmbeddingJobManager(max_workers=settings.embedding_job_workers)
@@ -0,0 +1,173 @@
+import random
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage, HumanMessage
+import rag_service
+from exceptions import LLMResponseError
+from metrics import track_stage, record_llm_usage, record_llm_event
+from logging_utils import logger
+from settings import settings
+
+
+# 재시도 백오프 최대 간격 (초)
+LLM_BACKOFF_MAX_SECONDS = 8.0
+# 대체 모델 몫으로 남기는 시간 = 호출 1회 제한 시간 + 여유 (초), 남은 시간의 절반을 넘지 않음
+FALLBACK_RESERVE_MARGIN_SECONDS = 2.0
+# 재요청 프롬프트에 넣을 파싱 오류 메시지 최대 길이
+REASK_ERROR_MAX_CHARS = 1000
+REASK_PROMPT = (
+    "직전 응답을 출력 형식에 맞는 JSON으로 파싱하지 못했습니다.\n"
+    "오류: {error}\n"
+    "설명 없이 출력 형식 지시에 맞는 JSON 객체만 다시 출력하세요."
+)
+
+
+# 429/5xx/연결 오류와 호출 1회 제한 시간 초과는 재시도 대상
+def is_retryable(e: Exception) -> bool:
+    import openai
+
+    return isinstance(e, (
+        asyncio.TimeoutError,
+        openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError,
+    ))
+
+def get_deadline(timeout: Optional[float] = None) -> float:
+    return asyncio.get_running_loop().time() + (settings.llm_timeout_seconds if timeout is None else timeout)
+
+def get_remaining(deadline: float) -> float:
+    return deadline - asyncio.get_running_loop().time()
+
+# 기본 모델이 재시도로 마감 시간을 다 써서 대체 모델을 못 부르는 일이 없도록 남겨 둘 시간
+def get_fallback_reserve(deadline: float) -> float:
+    half = get_remaining(deadline) / 2
+    if settings.llm_attempt_timeout_seconds <= 0:
+        return half
+    return min(half, settings.llm_attempt_timeout_seconds + FALLBACK_RESERVE_MARGIN_SECONDS)
+
+
+# 프롬프트 → LLM → 출력 파싱 (요청 마감 시간 안에서 재시도/헤징/대체 모델/출력 재요청)
+# deadline: 이벤트 루프 시각 기준 마감 시간 (생략하면 지금부터 LLM_TIMEOUT_SECONDS)
+# 반환: (파싱된 결과, 응답한 모델 "primary" | "fallback")
+async def invoke_llm(prompt_type: str, inputs: Dict[str, str], deadline: Optional[float] = None) -> Tuple[Dict[str, Any], str]:
+    if deadline is None:
+        deadline = get_deadline()
+    messages = rag_service.prompts[prompt_type].invoke(inputs).to_messages()
+    model_names = list(rag_service.llms)
+    # 뒤에 대체 모델이 있으면 그 몫을 뺀 시간 안에서만 기본 모델 재시도
+    reserve = get_fallback_reserve(deadline) if len(model_names) > 1 else 0.0
+
+    async with asyncio.timeout_at(deadline):
+        for model_name in model_names:
+            model_deadline = deadline if model_name == model_names[-1] else deadline - reserve
+            try:
+                message = await call_with_retries(prompt_type, model_name, messages, model_deadline)
+            except Exception as e:
+                if model_name != model_names[-1]:
+                    record_llm_event("fallback")
+                    logger.warning(f"{prompt_type} LLM 호출 실패, 대체 모델 {settings.llm_fallback_model}로 전환: {e!r}")
+                    continue
+                if isinstance(e, asyncio.TimeoutError):
+                    raise
+                raise LLMResponseError(f"LLM 호출에 실패했습니다: {e}") from e
+            return await parse_response(prompt_type, messages, message, model_name, deadline), model_name
+
+# 응답 파싱 (실패하면 JSON 부분만 잘라 다시 파싱, 그래도 실패하면 오류를 알려주고 같은 모델에 재요청)
+# 재요청 호출이 실패해도 다른 LLM 호출 실패와 같은 LLMResponseError (마감 시간 초과는 그대로)
+async def parse_response(prompt_type: str, messages: List[Any], message: AIMessage, model_name: str, deadline: float) -> Dict[str, Any]:
+    parser = rag_service.parsers[prompt_type]
+    for attempt in range(settings.llm_parse_retries + 1):
+        with track_stage("parse"):
+            try:
+                return parse_output(parser, message.content)
+            except OutputParserException as e:
+                error = e
+        if attempt == settings.llm_parse_retries:
+            raise LLMResponseError(f"LLM 응답을 출력 형식으로 파싱하지 못했습니다: {error}") from error
+
+        record_llm_event("reask")
+        logger.warning(f"{prompt_type} LLM 응답 파싱 실패, 재요청 {attempt + 1}/{settings.llm_parse_retries}: {error}")
+        messages = [
+            *messages,
+            AIMessage(content=message.content),
+            HumanMessage(content=REASK_PROMPT.format(error=str(error)[:REASK_ERROR_MAX_CHARS])),
+        ]
+        try:
+            async with asyncio.timeout_at(deadline):
+                message = await call_with_retries(prompt_type, model_name, messages, deadline)
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            raise LLMResponseError(f"LLM 재요청에 실패했습니다: {e}") from e
+
+# 코드 펜스/잘린 JSON은 파서가 처리하므로, 앞뒤에 설명이 붙은 경우만 가장 바깥 {...}로 복구
+def parse_output(parser, text: str) -> Dict[str, Any]:
+    try:
+        return parser.parse(text).model_dump()
+    except OutputParserException:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end < start or text[start:end + 1] == text.strip():
+            raise
+        result = parser.parse(text[start:end + 1]).model_dump()
+        record_llm_event("repair")
+        return result
+
+# 일시적 오류는 지수 백오프(+지터)로 재시도 (다음 시도를 마감 전에 시작할 수 없으면 바로 실패)
+async def call_with_retries(prompt_type: str, model_name: str, messages: List[Any], deadline: float) -> AIMessage:
+    model = rag_service.llms[model_name]
+    for attempt in range(settings.llm_max_retries + 1):
+        try:
+            message = await call_model(model, messages, deadline)
+            record_llm_usage(prompt_type, message.usage_metadata)
+            return message
+        except Exception as e:
+            if not is_retryable(e) or attempt == settings.llm_max_retries:
+                raise
+            delay = min(LLM_BACKOFF_MAX_SECONDS, settings.llm_retry_backoff_seconds * 2 ** attempt)
+            delay = delay / 2 + random.uniform(0, delay / 2)
+            if delay >= get_remaining(deadline):
+                raise
+            record_llm_event("retry")
+            logger.warning(f"{prompt_type} LLM({model_name}) 재시도 {attempt + 1}/{settings.llm_max_retries} ({delay:.1f}초 후): {e!r}")
+            await asyncio.sleep(delay)
+
+# LLM 호출 1회 (동시 호출 수 제한, 호출 1회 제한 시간과 남은 시간 중 짧은 쪽 적용)
+async def call_model(model, messages: List[Any], deadline: float) -> AIMessage:
+    timeout = get_remaining(deadline)
+    if settings.llm_attempt_timeout_seconds > 0:
+        timeout = min(timeout, settings.llm_attempt_timeout_seconds)
+    async with rag_service.llm_semaphore:
+        with track_stage("llm"):
+            return await hedged_invoke(model, messages, timeout)
+
+# LLM_HEDGE_AFTER_SECONDS 안에 응답이 없으면 같은 요청을 한 번 더 보내 먼저 성공한 응답 사용 (나머지는 취소)
+# 헤징 요청은 원래 요청과 같은 동시 호출 슬롯을 나눠 씀
+async def hedged_invoke(model, messages: List[Any], timeout: float) -> AIMessage:
+    def start():
+        task = asyncio.create_task(model.ainvoke(messages))
+        # 취소되거나 결과를 쓰지 않은 요청의 예외가 "never retrieved" 경고로 남지 않도록
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return task
+
+    hedge_after = settings.llm_hedge_after_seconds
+    tasks = [start()]
+    try:
+        async with asyncio.timeout(timeout):
+            if 0 < hedge_after < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    record_llm_event("hedge")
+                    tasks.append(start())
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            record_llm_event("hedge_won")
+                        return task.result()
+                if not pending:
+                    raise done.pop().exception()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,157 @@
+import re
+import json
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 요청마다 달라지는 값을 담는 키 (소문자, 구분자 제거 후 비교 / 지문 계산에서 제외)
+NOISE_KEYS = {
+    "timestamp", "ts", "time", "datetime", "date", "thread", "threadname", "threadid",
+    "requestid", "traceid", "spanid", "correlationid", "pid", "host", "hostname",
+    "instance", "instanceid", "seq", "sequence", "offset",
+}
+TIMESTAMP_PATTERN = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+)
+UUID_PATTERN = re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")
+HEX_PATTERN = re.compile(r"\b0x[0-9a-fA-F]+\b|\b(?=[0-9a-fA-F]*\d)(?=[0-9a-fA-F]*[a-fA-F])[0-9a-fA-F]{8,}\b")
+IP_PATTERN = re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}\b")
+THREAD_PATTERN = re.compile(r"\[(?:[\w.-]*(?:thread|exec|pool|worker|task|nio)[\w.-]*)\]", re.IGNORECASE)
+# 숫자는 ID/건수/시간처럼 요청마다 달라지는 것만 제거하고, 짧은 상태/오류 코드(HTTP 500, exit 1, ORA-01400)는 유지
+# - 4자리 이상 숫자 (코드 접두어가 붙은 "ORA-00001" 형태는 유지)
+# - id/번호/건수/포트 등 ID성 단어 뒤의 숫자, "#123"
+# - 단위가 붙은 시간/크기 ("1500ms", "3 s", "512KB")
+LONG_NUMBER_PATTERN = re.compile(r"(?<![\dA-Za-z_$<])(?<![A-Za-z]-)\d{4,}")
+ID_NUMBER_PATTERN = re.compile(
+    r"(\b\w*(?:id|no|num|number|count|size|port|seq|offset|index)\s*[=:]?\s*|#)\d+\b", re.IGNORECASE
+)
+MEASURE_PATTERN = re.compile(
+    r"(?<![\dA-Za-z_$<])\d+(?:\.\d+)?(\s*(?:ns|us|ms|millis|milliseconds|s|secs?|seconds|b|bytes|kb|mb|gb))\b", re.IGNORECASE
+)
+# 값이 숫자인 JSON 필드 중 키가 이 단어로 끝나면 크기와 관계없이 제거 (소문자, 구분자 제거 후 비교)
+ID_KEY_PATTERN = re.compile(r"(?:id|no|num|number|count|size|port|seq|offset|index|idx|bytes|duration|elapsed|latency|ms|millis)$")
+# 그 밖의 정수 필드는 이 값보다 작으면 (상태/오류 코드) 유지
+MAX_CODE_NUMBER = 10000
+LINE_NUMBER_PATTERN = re.compile(r"(\.java):\d+\)")
+
+EXCEPTION_PATTERN = re.compile(r"\b((?:[a-zA-Z_$][\w$]*\.)+[A-Z][\w$]*(?:Exception|Error|Throwable))\b")
+FRAME_PATTERN = re.compile(r"\bat\s+((?:[\w$]+\.)+[\w$<>]+)\(([\w$]+\.java)?:?(\d+)?\)")
+FINGERPRINT_FRAME_COUNT = 5
+
+
+@dataclass
+class LogGroup:
+    fingerprint: str
+    log: Dict[str, Any]                             # 대표 로그 (처음 들어온 원본)
+    normalized: Dict[str, Any]                      # 잡음을 제거한 로그 (검색 질의에 사용)
+    exception: str = ""
+    frames: List[str] = field(default_factory=list)
+    frame_lines: List[Optional[int]] = field(default_factory=list)    # frames와 같은 순서의 줄 번호
+    count: int = 1
+
+    # 검색 질의 문자열 (같은 지문이면 항상 같은 문자열이라 임베딩 캐시에 적중)
+    def query(self) -> str:
+        return json.dumps(self.normalized, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def is_noise_key(key: Any) -> bool:
+    return re.sub(r"[_\-@.]", "", str(key)).lower() in NOISE_KEYS
+
+# 문자열에서 타임스탬프, ID, IP, 스레드 이름, 숫자 잡음 제거
+def normalize_text(text: str) -> str:
+    text = TIMESTAMP_PATTERN.sub("<ts>", text)
+    text = UUID_PATTERN.sub("<id>", text)
+    text = IP_PATTERN.sub("<ip>", text)
+    text = THREAD_PATTERN.sub("[<thread>]", text)
+    text = LINE_NUMBER_PATTERN.sub(r"\1)", text)
+    text = HEX_PATTERN.sub("<hex>", text)
+    text = MEASURE_PATTERN.sub(r"<n>\1", text)
+    text = ID_NUMBER_PATTERN.sub(r"\1<n>", text)
+    text = LONG_NUMBER_PATTERN.sub("<n>", text)
+    return text
+
+def _is_id_key(key: Any) -> bool:
+    return bool(ID_KEY_PATTERN.search(re.sub(r"[_\-@.]", "", str(key)).lower()))
+
+# 숫자 필드: ID성 키/실수/큰 정수는 제거, 작은 정수(상태/오류 코드)는 유지
+def normalize_number(key: Any, value) -> Any:
+    if isinstance(value, float) or _is_id_key(key) or abs(value) >= MAX_CODE_NUMBER:
+        return "<n>"
+    return value
+
+def normalize_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: normalize_number(key, item) if _is_number(item) else normalize_value(item)
+            for key, item in value.items()
+            if not is_noise_key(key)
+        }
+    if isinstance(value, list):
+        return [normalize_value(item) for item in value]
+    if isinstance(value, str):
+        return normalize_text(value)
+    if _is_number(value):
+        return normalize_number("", value)
+    return value
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _iter_strings(value: Any):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if not is_noise_key(key):
+                yield from _iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_strings(item)
+    elif isinstance(value, str):
+        yield value
+
+# 예외 타입과 상위 스택 프레임 (클래스.메소드) 추출
+def extract_exception(log: Dict[str, Any]):
+    text = "\n".join(_iter_strings(log))
+    exception_match = EXCEPTION_PATTERN.search(text)
+    frame_matches = list(FRAME_PATTERN.finditer(text))
+    frames = [match.group(1) for match in frame_matches]
+    frame_lines = [int(match.group(3)) if match.group(3) else None for match in frame_matches]
+    return (exception_match.group(1) if exception_match else ""), frames, frame_lines
+
+# 스택 프레임 "com.x.Foo$Inner.lambda$bar$0" -> ("com.x.Foo.Inner", "bar") (청크 심볼과 같은 형식)
+def parse_frame(frame: str) -> Tuple[str, str]:
+    qualified_class, _, method = frame.rpartition(".")
+    # 익명 클래스($1)는 감싸는 클래스로
+    parts = [part for part in qualified_class.replace("$", ".").split(".") if part and not part.isdigit()]
+    if method == "<init>":
+        method = parts[-1] if parts else ""
+    elif method == "<clinit>":
+        method = ""
+    elif method.startswith("lambda$"):
+        method = method.split("$")[1]
+    return ".".join(parts), method
+
+# 예외가 있으면 예외 타입 + 상위 프레임, 없으면 정규화된 로그 전체로 지문 생성
+def fingerprint_log(log: Dict[str, Any]):
+    normalized = normalize_value(log)
+    exception, frames, frame_lines = extract_exception(log)
+    if exception or frames:
+        basis = "\n".join([exception, *frames[:FINGERPRINT_FRAME_COUNT]])
+    else:
+        basis = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+    fingerprint = hashlib.sha1(basis.encode("utf-8")).hexdigest()
+    return fingerprint, normalized, exception, frames, frame_lines
+
+# 같은 지문의 로그를 하나로 묶고 발생 횟수를 셈 (처음 나온 순서 유지)
+def group_logs(logs: List[Dict[str, Any]]) -> List[LogGroup]:
+    groups: Dict[str, LogGroup] = {}
+    for log in logs:
+        fingerprint, normalized, exception, frames, frame_lines = fingerprint_log(log)
+        if fingerprint in groups:
+            groups[fingerprint].count += 1
+        else:
+            groups[fingerprint] = LogGroup(
+                fingerprint=fingerprint, log=log, normalized=normalized,
+                exception=exception, frames=frames, frame_lines=frame_lines,
+            )
+    return list(groups.values())
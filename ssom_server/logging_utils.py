@@ -11,7 +11,12 @@ def log_relevant_docs(relevant_docs: list):
         logger.info("관련 문서를 찾을 수 없음\n")
     else:
         for i, doc in enumerate(relevant_docs, 1):
-            logger.info(f"문서 {i}: {doc.metadata.get('source')}")
+            metadata = doc.metadata
+            logger.info(
+                f"문서 {i}: {metadata.get('source')} "
+                f"{metadata.get('class_name', '')}#{metadata.get('method', '')} "
+                f"(L{metadata.get('start_line')}-{metadata.get('end_line')})"
+            )
             # logger.info(f"내용:\n{doc.page_content}\n\n")
 
 def log_llm_prompt(context: str, question: str):
@@ -0,0 +1,118 @@
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from embedding_cache import get_embedding_cache
+from response_cache import response_cache
+from logging_utils import logger
+from settings import settings
+
+
+# OpenTelemetry는 설치되어 있고 OTEL_ENABLED일 때만 사용 (exporter 설정은 배포 환경에서)
+tracer = None
+if settings.otel_enabled:
+    try:
+        from opentelemetry import trace
+        tracer = trace.get_tracer("ssom_server")
+    except ImportError:
+        logger.warning("opentelemetry 패키지가 없어 트레이싱을 사용하지 않음")
+
+# 단계별 소요 시간 (query_embedding, symbol_search, vector_search, context_build, llm, parse, index_embedding, index_upsert)
+STAGE_LATENCY = Histogram(
+    "ssom_stage_duration_seconds", "Duration of each analysis/indexing stage",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+ANALYSIS_LATENCY = Histogram(
+    "ssom_analysis_duration_seconds", "End-to-end duration of log analysis requests",
+    ["prompt_type", "mode"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+LLM_TOKENS = Counter("ssom_llm_tokens_total", "LLM tokens used", ["prompt_type", "kind"])
+LLM_EVENTS = Counter("ssom_llm_events_total", "LLM retries, hedged requests, fallbacks and output repairs", ["event"])
+RETRIEVALS = Counter("ssom_retrievals_total", "Per-log retrievals by how they were resolved", ["method"])
+INDEXED_CHUNKS = Counter("ssom_indexed_chunks_total", "Chunks embedded and upserted by indexing jobs")
+INDEXED_TOKENS = Counter("ssom_indexed_tokens_total", "Tokens sent for embedding by indexing jobs")
+INDEXING_LATENCY = Histogram(
+    "ssom_indexing_duration_seconds", "Duration of embed_documents runs", ["mode"],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+# 서버 시작 소요 시간 (import: 모듈 import, init: Qdrant 연결/모델/체인 초기화)
+STARTUP_SECONDS = Gauge("ssom_startup_seconds", "Time spent in each startup phase", ["phase"])
+
+
+# 캐시 통계는 요청 경로에서 따로 세지 않고 /metrics 조회 시 각 캐시의 stats()에서 읽음
+class CacheCollector:
+    def collect(self):
+        caches = {}
+        embedding_cache = get_embedding_cache()
+        if embedding_cache is not None:
+            caches["embedding"] = embedding_cache.stats()
+        if settings.response_cache_enabled:
+            caches["response"] = response_cache.stats()
+
+        requests = CounterMetricFamily("ssom_cache_requests", "Cache lookups by result", labels=["cache", "result"])
+        size = GaugeMetricFamily("ssom_cache_entries", "Entries currently cached", labels=["cache"])
+        for name, stats in caches.items():
+            for result in ("hits", "similar_hits", "misses"):
+                if result in stats:
+                    requests.add_metric([name, result], stats[result])
+            size.add_metric([name], stats["size"])
+        yield requests
+        yield size
+
+
+# 단계 소요 시간 기록 (메트릭/트레이싱이 모두 꺼져 있으면 아무것도 하지 않음)
+@contextmanager
+def track_stage(stage: str):
+    if not settings.metrics_enabled and tracer is None:
+        yield
+        return
+    span = tracer.start_as_current_span(f"ssom.{stage}") if tracer is not None else nullcontext()
+    started_at = time.perf_counter()
+    with span:
+        try:
+            yield
+        finally:
+            if settings.metrics_enabled:
+                STAGE_LATENCY.labels(stage).observe(time.perf_counter() - started_at)
+
+def observe_analysis(prompt_type: str, mode: str, seconds: float):
+    if settings.metrics_enabled:
+        ANALYSIS_LATENCY.labels(prompt_type, mode).observe(seconds)
+
+# AIMessage.usage_metadata 기준 프롬프트/응답 토큰 수
+def record_llm_usage(prompt_type: str, usage: Optional[dict]):
+    if settings.metrics_enabled and usage:
+        LLM_TOKENS.labels(prompt_type, "prompt").inc(usage.get("input_tokens", 0))
+        LLM_TOKENS.labels(prompt_type, "completion").inc(usage.get("output_tokens", 0))
+
+# retry | hedge | hedge_won | fallback | repair | reask
+def record_llm_event(event: str):
+    if settings.metrics_enabled:
+        LLM_EVENTS.labels(event).inc()
+
+def record_retrieval(method: str):
+    if settings.metrics_enabled:
+        RETRIEVALS.labels(method).inc()
+
+def record_indexed_batch(chunks: int, tokens: int):
+    if settings.metrics_enabled:
+        INDEXED_CHUNKS.inc(chunks)
+        INDEXED_TOKENS.inc(tokens)
+
+def observe_indexing(mode: str, seconds: float):
+    if settings.metrics_enabled:
+        INDEXING_LATENCY.labels(mode).observe(seconds)
+
+def record_startup(phase: str, seconds: float):
+    if settings.metrics_enabled:
+        STARTUP_SECONDS.labels(phase).set(seconds)
+
+def render_metrics():
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+if settings.metrics_enabled:
+    REGISTRY.register(CacheCollector())
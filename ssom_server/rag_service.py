@@ -1,8 +1,15 @@
-from langchain_qdrant import QdrantVectorStore
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough
-from qdrant_client import QdrantClient
+import time
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.retrievers import BaseRetriever
 
+from embedding_cache import CachedEmbeddings, get_model_cache_name
+from exceptions import ServiceNotReadyError
+from log_normalizer import LogGroup, parse_frame
+from metrics import track_stage, record_retrieval, record_startup
 from log_summary_prompt import get_prompt_template as get_log_prompt, get_output_schema as get_log_schema
 from github_issue_prompt import get_prompt_template as get_github_prompt, get_output_schema as get_github_schema
 
@@ -10,54 +17,333 @@ from logging_utils import logger
 from settings import settings
 
 
-# Qdrant client 연결
-client = QdrantClient(host=settings.qdrant_host, port=settings.qdrant_port)
+# Qdrant/OpenAI 클라이언트와 임베딩 모델은 서버 시작 후 initialize()에서 생성
+# (qdrant_client/openai/langchain_openai import와 Qdrant 연결이 import 시점에 일어나지 않도록)
+client = None
+async_client = None
+embedding_model = None
+# 벡터 검색 파라미터 (HNSW ef, 양자화 재채점/oversampling)
+search_params = None
 
-if not client.collection_exists(settings.collection_name):
-    from qdrant_client.http.models import VectorParams, Distance
-    client.create_collection(
-        collection_name=settings.collection_name,
-        vectors_config=VectorParams(size=1536, distance=Distance.COSINE),
+# 초기화 상태 (readiness에 사용)
+startup = {"ready": False, "attempts": 0, "error": None}
+STARTUP_BACKOFF_BASE_SECONDS = 0.5
+
+# langchain_qdrant.QdrantVectorStore.CONTENT_KEY/METADATA_KEY와 같은 payload 키
+CONTENT_KEY = "page_content"
+METADATA_KEY = "metadata"
+
+# 심볼 조회에 쓰는 상위 스택 프레임 수 / 심볼 하나당 가져오는 최대 청크 수 (분할된 클래스/메소드 청크)
+SYMBOL_FRAME_LIMIT = 8
+SYMBOL_CHUNK_LIMIT = 4
+# 이 안의 상위 프레임이 메소드까지 조회돼야 벡터 검색 생략
+SYMBOL_RESOLVE_FRAMES = 3
+# Reciprocal Rank Fusion 상수
+RRF_K = 60
+
+def to_document(point, score: Optional[float] = None) -> Document:
+    payload = point.payload or {}
+    if score is None:
+        score = getattr(point, "score", None)
+    return Document(
+        page_content=payload.get(CONTENT_KEY, ""),
+        metadata={**payload.get(METADATA_KEY, {}), "_id": point.id, "_score": score},
     )
-    logger.info(f"{settings.collection_name} 컬렉션 자동 생성됨")
-
-# 임베딩 모델
-embedding_model = OpenAIEmbeddings(
-    model=settings.embedding_model,
-)
-
-# Qdrant VectorStore
-vectorstore = QdrantVectorStore(
-    client=client,
-    collection_name=settings.collection_name,
-    embedding=embedding_model,
-)
-
-# Retriever
-retriever = vectorstore.as_retriever(search_kwargs={"k": settings.retriever_top_k})
-
-def get_chain_and_retriever(prompt_type: str):
-    if prompt_type == "log_summary":
-        prompt_template = get_log_prompt()
-        output_schema = get_log_schema()
-    elif prompt_type == "github_issue":
-        prompt_template = get_github_prompt()
-        output_schema = get_github_schema()
-    else:
-        raise ValueError("지원하지 않는 프롬프트 타입입니다.")
 
-    # LLM
+# 심볼 검색 결과와 벡터 검색 결과를 순위 기반으로 합침
+def fuse_results(*results: List[Document]) -> List[Document]:
+    scores, docs = {}, {}
+    for result in results:
+        for rank, doc in enumerate(result):
+            key = doc.metadata.get("_id")
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1 / (RRF_K + rank + 1)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+# 심볼 조회에 쓸 상위 스택 프레임 (위치, 클래스, 메소드, 줄 번호)
+def get_symbol_frames(log_group: LogGroup) -> List[Tuple[int, str, str, Optional[int]]]:
+    frames = []
+    for position, frame in enumerate(log_group.frames[:SYMBOL_FRAME_LIMIT]):
+        qualified_class, method = parse_frame(frame)
+        if qualified_class:
+            frames.append((position, qualified_class, method, log_group.frame_lines[position]))
+    return frames
+
+# 프레임 순서대로 "클래스#메소드", "클래스" 심볼 (중복 제거)
+def get_frame_symbols(frames: List[Tuple[int, str, str, Optional[int]]]) -> List[str]:
+    symbols = []
+    for _, qualified_class, method, _ in frames:
+        for symbol in (f"{qualified_class}#{method}" if method else None, qualified_class):
+            if symbol and symbol not in symbols:
+                symbols.append(symbol)
+    return symbols
+
+# 스택 위쪽 프레임 → 메소드 일치 → 줄 번호 포함 순으로 정렬
+# 상위 SYMBOL_RESOLVE_FRAMES 프레임 중 메소드까지 일치하는 청크가 있어야 resolved
+def rank_symbol_points(frames: List[Tuple[int, str, str, Optional[int]]], points) -> Tuple[List[Document], bool]:
+    ranked, resolved = [], False
+    for point in points:
+        doc = to_document(point, score=1.0)
+        symbol = doc.metadata.get("symbol")
+        start_line, end_line = doc.metadata.get("start_line", 0), doc.metadata.get("end_line", 0)
+        best = None
+        for position, qualified_class, method, line in frames:
+            if method and symbol == f"{qualified_class}#{method}":
+                key = (position, 0, 0 if line and start_line <= line <= end_line else 1)
+                resolved = resolved or position < SYMBOL_RESOLVE_FRAMES
+            elif symbol == qualified_class:
+                key = (position, 1, 1)
+            else:
+                continue
+            best = key if best is None else min(best, key)
+        if best is not None:
+            ranked.append((best, doc))
+    ranked.sort(key=lambda item: item[0])
+    return [doc for _, doc in ranked], resolved
+
+# alias 컬렉션 검색 Retriever (ainvoke는 스레드 풀 없이 비동기 임베딩/Qdrant 클라이언트로 처리)
+# collection_name: 검색할 레포별 alias
+class CodeRetriever(BaseRetriever):
+    k: int
+    collection_name: str
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        vector = embedding_model.embed_query(query)
+        response = client.query_points(
+            collection_name=self.collection_name, query=vector, limit=self.k, with_payload=True, search_params=search_params,
+        )
+        return [to_document(point) for point in response.points]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        # 단계별 제한 시간 (임베딩 → 벡터 검색)
+        with track_stage("query_embedding"):
+            vector = await asyncio.wait_for(
+                embedding_model.aembed_query(query), timeout=settings.embedding_timeout_seconds,
+            )
+        async with search_semaphore:
+            with track_stage("vector_search"):
+                response = await asyncio.wait_for(
+                    async_client.query_points(
+                        collection_name=self.collection_name, query=vector, limit=self.k, with_payload=True, search_params=search_params,
+                    ),
+                    timeout=settings.search_timeout_seconds,
+                )
+        return [to_document(point) for point in response.points]
+
+    # 스택 프레임의 클래스/메소드 심볼로 청크를 바로 조회 (임베딩 없이 payload 인덱스만 사용)
+    # 반환: (프레임 순서로 정렬한 문서, 상위 프레임을 메소드 단위로 찾았는지)
+    async def asearch_symbols(self, log_group: LogGroup) -> Tuple[List[Document], bool]:
+        return (await self.asearch_symbols_batch([log_group]))[0]
+
+    # 여러 로그의 심볼 조회를 Qdrant 배치 요청 1회로 처리 (로그별 결과는 요청 순서대로 다시 나눔)
+    async def asearch_symbols_batch(self, log_groups: List[LogGroup]) -> List[Tuple[List[Document], bool]]:
+        from qdrant_client.models import FieldCondition, Filter, MatchValue, QueryRequest
+
+        frames_list = [get_symbol_frames(log_group) for log_group in log_groups]
+        # 심볼마다 따로 조회해야 깊은 프레임이나 잘게 나뉜 클래스 청크가 위쪽 프레임 결과를 밀어내지 않음
+        symbols_list = [get_frame_symbols(frames) for frames in frames_list]
+        requests = [
+            QueryRequest(
+                filter=Filter(must=[FieldCondition(key="metadata.symbol", match=MatchValue(value=symbol))]),
+                limit=SYMBOL_CHUNK_LIMIT, with_payload=True,
+            )
+            for symbols in symbols_list for symbol in symbols
+        ]
+        if not requests:
+            return [([], False) for _ in log_groups]
+
+        async with search_semaphore:
+            with track_stage("symbol_search"):
+                responses = await asyncio.wait_for(
+                    async_client.query_batch_points(collection_name=self.collection_name, requests=requests),
+                    timeout=settings.search_timeout_seconds,
+                )
+
+        results, offset = [], 0
+        for frames, symbols in zip(frames_list, symbols_list):
+            group_responses = responses[offset:offset + len(symbols)]
+            offset += len(symbols)
+            points = {point.id: point for response in group_responses for point in response.points}.values()
+            results.append(rank_symbol_points(frames, points))
+        return results
+
+    # 상위 스택 프레임이 메소드까지 조회되면 임베딩/벡터 검색 없이 반환, 아니면 벡터 검색 결과와 합침
+    async def aretrieve(self, log_group: LogGroup) -> List[Document]:
+        symbol_docs, resolved = [], False
+        if settings.symbol_search_enabled:
+            symbol_docs, resolved = await self.asearch_symbols(log_group)
+        if resolved:
+            record_retrieval("symbol")
+            return symbol_docs[:self.k]
+        dense_docs = await self.ainvoke(log_group.query())
+        return self._merge(symbol_docs, dense_docs)
+
+    # 여러 로그를 한 번에 검색 (심볼 배치 조회 1회 → 심볼로 못 찾은 로그만 임베딩 요청 1회 + Qdrant 배치 검색 1회)
+    async def aretrieve_batch(self, log_groups: List[LogGroup]) -> List[List[Document]]:
+        from qdrant_client.models import QueryRequest
+
+        symbol_results = [([], False)] * len(log_groups)
+        if settings.symbol_search_enabled:
+            symbol_results = await self.asearch_symbols_batch(log_groups)
+
+        pending = [index for index, (_, resolved) in enumerate(symbol_results) if not resolved]
+        dense_results = {}
+        if pending:
+            with track_stage("query_embedding"):
+                vectors = await asyncio.wait_for(
+                    embedding_model.aembed_documents([log_groups[index].query() for index in pending]),
+                    timeout=settings.embedding_timeout_seconds,
+                )
+            async with search_semaphore:
+                with track_stage("vector_search"):
+                    responses = await asyncio.wait_for(
+                        async_client.query_batch_points(
+                            collection_name=self.collection_name,
+                            requests=[
+                                QueryRequest(query=vector, limit=self.k, with_payload=True, params=search_params)
+                                for vector in vectors
+                            ],
+                        ),
+                        timeout=settings.search_timeout_seconds,
+                    )
+            for index, response in zip(pending, responses):
+                dense_results[index] = [to_document(point) for point in response.points]
+
+        results = []
+        for index, (symbol_docs, _) in enumerate(symbol_results):
+            if index in dense_results:
+                results.append(self._merge(symbol_docs, dense_results[index]))
+            else:
+                record_retrieval("symbol")
+                results.append(symbol_docs[:self.k])
+        return results
+
+    def _merge(self, symbol_docs: List[Document], dense_docs: List[Document]) -> List[Document]:
+        if not symbol_docs:
+            record_retrieval("dense")
+            return dense_docs
+        record_retrieval("hybrid")
+        return fuse_results(symbol_docs, dense_docs)[:self.k]
+
+# 동시에 처리하는 벡터 검색/LLM 호출 수 제한
+search_semaphore = asyncio.Semaphore(settings.search_max_concurrency)
+llm_semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+
+# 레포별 alias → Retriever (처음 요청될 때 만들어 재사용)
+retrievers: Dict[str, CodeRetriever] = {}
+
+def get_retriever(collection_name: str) -> CodeRetriever:
+    if collection_name not in retrievers:
+        retrievers[collection_name] = CodeRetriever(k=settings.retriever_top_k, collection_name=collection_name)
+    return retrievers[collection_name]
+
+# 프롬프트 타입별 (프롬프트, 출력 스키마, 로그+코드 context 토큰 예산) 등록 - 새 프롬프트는 여기에 추가
+PROMPT_REGISTRY = {
+    "log_summary": (get_log_prompt, get_log_schema, settings.log_summary_token_budget),
+    "github_issue": (get_github_prompt, get_github_schema, settings.github_issue_token_budget),
+}
+
+# 서버 시작 시 한 번 만들어 재사용하는 프롬프트 타입별 프롬프트/체인/출력 파서와 LLM ("primary", 설정 시 "fallback")
+prompts = {}
+chains = {}
+parsers = {}
+llms = {}
+
+# 재시도/제한 시간은 llm_runner에서 요청 마감 시간 기준으로 처리하므로 클라이언트 자체 재시도는 끔
+# JSON 모드 (with_structured_output(method="json_mode")와 같은 요청)
+def make_json_llm(model: str):
+    from langchain_openai import ChatOpenAI
+
     llm = ChatOpenAI(
-        model=settings.llm_model,
+        model=model,
         temperature=settings.llm_temperature,
-    ).with_structured_output(output_schema, method="json_mode")
+        stream_usage=True,
+        max_retries=0,
+    )
+    return llm.bind(response_format={"type": "json_object"})
+
+def init_chains():
+    started_at = time.perf_counter()
+
+    # LLM (HTTP 클라이언트/커넥션 풀을 모든 체인이 공유)
+    llms["primary"] = make_json_llm(settings.llm_model)
+    if settings.llm_fallback_model:
+        llms["fallback"] = make_json_llm(settings.llm_fallback_model)
+    for prompt_type, (get_prompt_template, get_output_schema, _) in PROMPT_REGISTRY.items():
+        # 검색은 요청 처리 단계에서 끝내고 context를 직접 넘기므로 체인은 프롬프트 → LLM만 수행
+        # 파싱은 따로 해서 LLM/파싱 시간과 토큰 사용량(AIMessage.usage_metadata)을 측정
+        prompts[prompt_type] = get_prompt_template()
+        chains[prompt_type] = prompts[prompt_type] | llms["primary"]
+        parsers[prompt_type] = PydanticOutputParser(pydantic_object=get_output_schema())
 
-    # 입력을 여러 체인(또는 함수)에 병렬로 전달
-    setup_and_retrieval = RunnableParallel(
-        context=lambda x: retriever.invoke(x["question"]),
-        question=RunnablePassthrough()
+    logger.info(
+        f"체인 초기화 완료: {list(chains)}, LLM {settings.llm_model}"
+        f"{f' (대체 {settings.llm_fallback_model})' if settings.llm_fallback_model else ''} "
+        f"({(time.perf_counter() - started_at) * 1000:.1f}ms)"
     )
-    # LCEL 체인 조립: 병렬 결과 → 프롬프트 → LLM
-    chain = setup_and_retrieval | prompt_template | llm
 
-    return chain, retriever
+# collection_name을 생략하면 기본 alias (COLLECTION_NAME) 검색
+def get_chain_and_retriever(prompt_type: str, collection_name: Optional[str] = None):
+    if prompt_type not in PROMPT_REGISTRY:
+        raise ValueError("지원하지 않는 프롬프트 타입입니다.")
+    ensure_ready()
+
+    return chains[prompt_type], get_retriever(collection_name or settings.collection_name)
+
+def get_token_budget(prompt_type: str) -> int:
+    return PROMPT_REGISTRY[prompt_type][2]
+
+
+# Qdrant 연결 → 검색용 기본 alias 확인/생성 → 임베딩 모델/체인 생성 (블로킹, 스레드에서 실행)
+def init_services():
+    global client, async_client, embedding_model, search_params
+    from qdrant_client import QdrantClient, AsyncQdrantClient
+    from langchain_openai import OpenAIEmbeddings
+    from collection_manager import ensure_alias, get_search_params
+
+    qdrant = QdrantClient(host=settings.qdrant_host, port=settings.qdrant_port)
+    # 검색은 항상 alias를 통해 수행 (재인덱싱 시 alias만 새 버전 컬렉션으로 전환됨)
+    active_collection = ensure_alias(qdrant, settings.collection_name)
+    logger.info(f"{settings.collection_name} 검색 대상 컬렉션: {active_collection}")
+
+    # 임베딩 모델 (반복되는 로그는 캐시에서 가져옴)
+    embedding_model = CachedEmbeddings(
+        OpenAIEmbeddings(model=settings.embedding_model, dimensions=settings.embedding_dimensions or None),
+        get_model_cache_name(),
+    )
+    search_params = get_search_params()
+    init_chains()
+    # 요청 처리 경로는 비동기 클라이언트 사용
+    client = qdrant
+    async_client = AsyncQdrantClient(host=settings.qdrant_host, port=settings.qdrant_port)
+
+# 서버 시작 시 백그라운드 태스크로 실행 (Qdrant가 준비될 때까지 지수 백오프로 재시도, 그동안 readiness는 실패)
+async def initialize():
+    started_at = time.perf_counter()
+    delay = STARTUP_BACKOFF_BASE_SECONDS
+    while True:
+        startup["attempts"] += 1
+        try:
+            await asyncio.to_thread(init_services)
+            break
+        except Exception as e:
+            startup["error"] = str(e)
+            logger.warning(f"서비스 초기화 실패 ({startup['attempts']}회), {delay:.1f}초 후 재시도: {e}")
+            await asyncio.sleep(delay)
+            delay = min(settings.startup_backoff_max_seconds, delay * 2)
+
+    startup.update({"ready": True, "error": None})
+    elapsed = time.perf_counter() - started_at
+    record_startup("init", elapsed)
+    logger.info(f"서비스 초기화 완료 ({startup['attempts']}회 시도, {elapsed * 1000:.1f}ms)")
+
+def is_ready() -> bool:
+    return startup["ready"]
+
+def ensure_ready():
+    if not startup["ready"]:
+        raise ServiceNotReadyError("서비스를 초기화하는 중입니다.")
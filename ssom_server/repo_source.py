@@ -0,0 +1,216 @@
+import os
+import re
+import time
+import shutil
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+from exceptions import EmbeddingCancelled
+from logging_utils import logger
+from settings import settings
+
+
+GITHUB_REPO_ROOT = Path("./github_repo")
+# 앞부분에 NUL 바이트가 있으면 바이너리 파일로 보고 건너뜀
+BINARY_SNIFF_BYTES = 8192
+# git 명령 실행 중 취소/제한 시간 확인 간격 (초)
+GIT_POLL_SECONDS = 0.5
+# scp 형식 SSH 주소 ("git@github.com:owner/repo.git", 경로 부분만 추출)
+SCP_URL_PATTERN = re.compile(r"^[\w.-]+@[\w.-]+:(?!//)(.+)$")
+
+
+# 깃허브 URL에서 레포 이름 추출 ("owner/repo" -> "owner__repo", 이름이 같은 다른 레포와 디렉토리/상태가 겹치지 않도록)
+# 브랜치를 지정하면 "owner__repo@branch" (브랜치별로 따로 클론/인덱싱)
+def get_repo_name(github_url: str, branch: Optional[str] = None) -> str:
+    match = SCP_URL_PATTERN.match(github_url.strip())
+    path = match.group(1) if match else urlparse(github_url).path
+    parts = [part for part in path.split("/") if part]
+    if not parts:
+        raise ValueError(f"레포 경로를 찾을 수 없는 주소입니다: {github_url}")
+    parts[-1] = parts[-1].removesuffix(".git")
+    repo_name = "__".join(parts[-2:])
+    if branch:
+        repo_name += "@" + re.sub(r"[^A-Za-z0-9._-]", "-", branch)
+    return repo_name
+
+# 분석 API의 레포 식별자("owner/repo", "owner/repo@branch", GitHub URL, 레포 이름)를 레포 이름으로 변환
+def parse_repo_id(repo: str) -> str:
+    path, branch = repo.strip(), None
+    if "@" in path.rsplit("/", 1)[-1]:
+        path, branch = path.rsplit("@", 1)
+    if "://" not in path and not SCP_URL_PATTERN.match(path):
+        path = f"https://github.com/{path.strip('/')}"
+    return get_repo_name(path, branch)
+
+def get_clone_dir(repo_name: str) -> str:
+    return str(GITHUB_REPO_ROOT / repo_name)
+
+# git 명령 실행 후 stdout 반환
+# GIT_TIMEOUT_SECONDS를 넘거나 cancel_event가 설정되면 프로세스를 종료 (멈춘 fetch가 작업 워커를 붙잡지 않도록)
+def run_git(args: list, cwd: str, cancel_event=None) -> str:
+    command = ["git", *args]
+    process = subprocess.Popen(
+        command, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    deadline = time.monotonic() + settings.git_timeout_seconds
+    while True:
+        try:
+            stdout, stderr = process.communicate(timeout=GIT_POLL_SECONDS)
+            break
+        except subprocess.TimeoutExpired:
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if not cancelled and time.monotonic() < deadline:
+                continue
+            process.kill()
+            process.communicate()
+            if cancelled:
+                raise EmbeddingCancelled("임베딩 작업이 취소되었습니다.")
+            raise subprocess.TimeoutExpired(command, settings.git_timeout_seconds)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+    return stdout.strip()
+
+
+def split_globs(value: str) -> List[str]:
+    return [pattern.strip() for pattern in value.split(",") if pattern.strip()]
+
+# glob → 정규식 ("**/"는 0개 이상의 디렉토리, "*"/"?"는 "/"를 넘지 않음)
+@lru_cache(maxsize=None)
+def compile_glob(pattern: str) -> re.Pattern:
+    regex, index = "", 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            regex, index = regex + "(?:.*/)?", index + 3
+        elif pattern.startswith("**", index):
+            regex, index = regex + ".*", index + 2
+        elif pattern[index] == "*":
+            regex, index = regex + "[^/]*", index + 1
+        elif pattern[index] == "?":
+            regex, index = regex + "[^/]", index + 1
+        else:
+            regex, index = regex + re.escape(pattern[index]), index + 1
+    return re.compile(regex)
+
+# 레포 기준 상대 경로가 인덱싱 대상인지 (include 중 하나와 일치하고 exclude와는 일치하지 않음)
+def in_scope(path: str) -> bool:
+    if not any(compile_glob(pattern).fullmatch(path) for pattern in split_globs(settings.repo_include_globs)):
+        return False
+    return not any(compile_glob(pattern).fullmatch(path) for pattern in split_globs(settings.repo_exclude_globs))
+
+# 인덱싱 범위 설정 (바뀌면 증분 반영 시 전체 비교)
+def get_scope() -> str:
+    return f"{settings.repo_include_globs}|{settings.repo_exclude_globs}"
+
+# sparse-checkout 패턴 (gitignore 형식, exclude는 "!"로 제외)
+def sparse_patterns() -> List[str]:
+    return [
+        *split_globs(settings.repo_include_globs),
+        *(f"!{pattern}" for pattern in split_globs(settings.repo_exclude_globs)),
+    ]
+
+def _depth_args() -> List[str]:
+    return [f"--depth={settings.repo_clone_depth}"] if settings.repo_clone_depth > 0 else []
+
+# 클론이 없으면 새로 받고, 있으면 fetch 후 원격 HEAD로 맞춤
+# 얕은(depth) + blob 필터 + sparse-checkout으로 HEAD의 인덱싱 대상 파일 내용만 받음
+# branch를 지정하지 않으면 원격 기본 브랜치
+def sync_repository(github_url: str, clone_dir: str, branch: Optional[str] = None, cancel_event=None) -> str:
+    clone_path = Path(clone_dir)
+    if (clone_path / ".git").is_dir():
+        try:
+            origin_url = run_git(["remote", "get-url", "origin"], clone_dir)
+        except subprocess.CalledProcessError:
+            origin_url = None
+        if origin_url != github_url:
+            logger.info(f"원격 주소가 달라 기존 클론 삭제: {clone_dir}")
+            shutil.rmtree(clone_path)
+
+    if (clone_path / ".git").is_dir():
+        run_git(
+            ["fetch", *_depth_args(), "--filter=blob:none", "--prune", "origin", *([branch] if branch else [])],
+            clone_dir, cancel_event,
+        )
+        run_git(["sparse-checkout", "set", "--no-cone", *sparse_patterns()], clone_dir, cancel_event)
+        run_git(["reset", "--hard", "FETCH_HEAD"], clone_dir, cancel_event)
+        logger.info(f"GitHub 레포지토리 fetch 완료: {github_url}")
+    else:
+        clone_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            run_git(
+                [
+                    "clone", *_depth_args(), "--filter=blob:none", "--no-checkout", "--single-branch",
+                    *(["--branch", branch] if branch else []), github_url, clone_path.name,
+                ],
+                str(clone_path.parent), cancel_event,
+            )
+            run_git(["sparse-checkout", "set", "--no-cone", *sparse_patterns()], clone_dir, cancel_event)
+            run_git(["reset", "--hard", "HEAD"], clone_dir, cancel_event)
+        except BaseException:
+            # 중단된 클론이 남으면 다음 작업이 fetch로 이어가므로 삭제
+            shutil.rmtree(clone_path, ignore_errors=True)
+            raise
+        logger.info(f"GitHub 레포지토리 클론 완료: {github_url}")
+
+    return run_git(["rev-parse", "HEAD"], clone_dir)
+
+# 체크아웃된 인덱싱 대상 파일 (레포 기준 상대 경로)
+def list_source_files(clone_dir: str) -> set:
+    files = set()
+    for root, dirs, names in os.walk(clone_dir):
+        dirs[:] = [name for name in dirs if name != ".git"]
+        for name in names:
+            path = Path(root, name).relative_to(clone_dir).as_posix()
+            if in_scope(path):
+                files.add(path)
+    return files
+
+# 마지막 인덱싱 커밋 이후 변경된 인덱싱 대상 파일 (변경/추가 목록, 삭제 목록)
+def get_changed_java_files(clone_dir: str, last_commit: str, head_commit: str):
+    diff = run_git(
+        ["diff", "--name-status", "--no-renames", last_commit, head_commit, "--", "*.java"],
+        clone_dir,
+    )
+    changed, deleted = [], []
+    for line in diff.splitlines():
+        status, path = line.split("\t", 1)
+        if not in_scope(path):
+            continue
+        if status == "D":
+            deleted.append(path)
+        else:
+            changed.append(path)
+    return changed, deleted
+
+# 파일 읽기 (크기 초과/바이너리는 None, 줄바꿈은 텍스트 모드 읽기와 같게 "\n"으로 통일)
+def read_source_file(file_path: Path) -> Optional[str]:
+    try:
+        size = file_path.stat().st_size
+        if size > settings.max_source_file_bytes:
+            logger.warning(f"파일이 너무 커서 건너뜀 ({size} bytes): {file_path}")
+            return None
+        data = file_path.read_bytes()
+    except OSError as e:
+        logger.warning(f"파일을 읽을 수 없어 건너뜀: {file_path} ({e})")
+        return None
+    if b"\0" in data[:BINARY_SNIFF_BYTES]:
+        logger.warning(f"바이너리 파일이라 건너뜀: {file_path}")
+        return None
+    return data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+
+# 스레드 풀에서 파일을 미리 읽어 순서대로 반환 (앞서 읽는 파일 수를 제한해 메모리 사용량 유지)
+def iter_source_files(clone_dir: str, paths: List[str]) -> Iterator[Tuple[str, Optional[str]]]:
+    read_ahead = settings.file_read_workers * 2
+    with ThreadPoolExecutor(max_workers=settings.file_read_workers, thread_name_prefix="file-reader") as executor:
+        pending = deque()
+        for path in paths:
+            pending.append((path, executor.submit(read_source_file, Path(clone_dir) / path)))
+            if len(pending) >= read_ahead:
+                ready_path, future = pending.popleft()
+                yield ready_path, future.result()
+        while pending:
+            ready_path, future = pending.popleft()
+            yield ready_path, future.result()
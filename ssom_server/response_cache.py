@@ -0,0 +1,110 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+from settings import settings
+
+
+@dataclass
+class CacheEntry:
+    scope: str
+    value: Dict[str, Any]
+    expires_at: float
+    vector: Optional[np.ndarray] = None
+
+
+# 분석 결과 캐시 (TTL + 최근 사용 순 크기 제한, 선택적으로 유사 로그 조회)
+class ResponseCache:
+    def __init__(self, ttl_seconds: int, max_entries: int, similarity_threshold: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # 프롬프트 타입/인덱스 버전/모델 설정이 같은 결과끼리만 재사용
+    @staticmethod
+    def make_scope(prompt_type: str, index_version: str) -> str:
+        return f"{prompt_type}|{index_version}|{settings.llm_model}|{settings.llm_temperature}"
+
+    @staticmethod
+    def make_key(scope: str, fingerprints: List[str]) -> str:
+        basis = "\n".join([scope, *sorted(set(fingerprints))])
+        return hashlib.sha256(basis.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    # 같은 scope에서 로그 벡터의 코사인 유사도가 임계값 이상인 결과 조회
+    def find_similar(self, scope: str, vector: List[float]) -> Optional[Dict[str, Any]]:
+        if self.similarity_threshold <= 0:
+            return None
+        query = self._normalize(vector)
+        now = time.time()
+        with self._lock:
+            best_key, best_score = None, self.similarity_threshold
+            for key, entry in self._entries.items():
+                if entry.scope != scope or entry.vector is None or entry.expires_at < now:
+                    continue
+                score = float(np.dot(query, entry.vector))
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            self.similar_hits += 1
+            # exact 조회에서 miss로 집계된 요청이므로 보정
+            self.misses -= 1
+            return self._entries[best_key].value
+
+    def put(self, key: str, scope: str, value: Dict[str, Any], vector: Optional[List[float]] = None):
+        entry = CacheEntry(
+            scope=scope,
+            value=value,
+            expires_at=time.time() + self.ttl_seconds,
+            vector=self._normalize(vector) if vector is not None else None,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.similar_hits + self.misses
+        return {
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.similar_hits) / total, 4) if total else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+
+response_cache = ResponseCache(
+    ttl_seconds=settings.response_cache_ttl_seconds,
+    max_entries=settings.response_cache_max_entries,
+    similarity_threshold=settings.response_cache_similarity_threshold,
+)
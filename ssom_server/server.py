@@ -1,27 +1,60 @@
+import time
+# 서버 모듈 import 소요 시간 측정 시작 (무거운 클라이언트/모델 import는 시작 후 백그라운드 초기화로 미룸)
+IMPORT_STARTED_AT = time.perf_counter()
 import traceback
 import asyncio
 import json
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from langchain_core.messages import AIMessage
+from langchain_core.utils.json import parse_partial_json
 from fastapi_health import health
 from pydantic import BaseModel
-from qdrant_client import QdrantClient
-from embedding_service import embed_documents
-from rag_service import get_chain_and_retriever
-from logging_utils import log_relevant_docs, log_llm_prompt
-from exceptions import CustomException, custom_exception_handler
-from typing import List, Dict, Any
+from index_state import get_index_state, resolve_repo, record_rollback
+from job_manager import job_manager
+from embedding_cache import get_embedding_cache
+from log_normalizer import LogGroup, group_logs
+from context_builder import build_prompt_context
+from metrics import track_stage, observe_analysis, record_llm_usage, record_startup, render_metrics
+import rag_service
+from rag_service import initialize, is_ready, ensure_ready, get_chain_and_retriever, get_token_budget, llm_semaphore
+from llm_runner import invoke_llm, parse_response, get_deadline, get_remaining, is_retryable
+from response_cache import response_cache
+from logging_utils import logger, log_relevant_docs, log_llm_prompt
+from exceptions import CustomException, ServiceNotReadyError, LLMResponseError, custom_exception_handler
+from typing import List, Dict, Any, Optional
 from settings import settings
 
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED_AT
+
+# 서버 시작 시 Qdrant 연결/체인/LLM 클라이언트를 백그라운드에서 한 번만 생성
+# (초기화를 기다리지 않고 바로 요청을 받으며, 끝나기 전까지 readiness 실패 및 분석 API 503)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info(f"서버 모듈 import 완료 ({IMPORT_SECONDS * 1000:.1f}ms)")
+    record_startup("import", IMPORT_SECONDS)
+    app.state.init_task = asyncio.create_task(initialize())
+    yield
+    app.state.init_task.cancel()
+    job_manager.shutdown()
+
 # FastAPI 앱 생성
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_exception_handler(CustomException, custom_exception_handler)
 
 # request 스키마
 class QuestionRequest(BaseModel):
     log: List[Dict[str, Any]]
 
+# 배치 분석: 장애(로그 묶음)별로 분석하고 입력 순서대로 결과 반환
+class BatchQuestionRequest(BaseModel):
+    incidents: List[List[Dict[str, Any]]]
+
 class EmbeddingRequest(BaseModel):
     github_url: str
+    # 생략하면 원격 기본 브랜치 (브랜치마다 따로 인덱싱)
+    branch: Optional[str] = None
 
 # response 스키마
 class QuestionResponseItem(BaseModel):
@@ -33,16 +66,47 @@ class QuestionResponse(BaseModel):
     message: str
     result: List[QuestionResponseItem]
 
+class BatchQuestionResponse(BaseModel):
+    isSuccess: bool
+    code: str
+    message: str
+    result: List[QuestionResponse]
+
 class EmbeddingResponse(BaseModel):
     isSuccess: bool
     code: str
     message: str
 
-# Qdrant 연결 체크 함수
+class EmbeddingJobResponse(BaseModel):
+    isSuccess: bool
+    code: str
+    message: str
+    result: Dict[str, Any]
+
+class EmbeddingJobListResponse(BaseModel):
+    isSuccess: bool
+    code: str
+    message: str
+    result: List[Dict[str, Any]]
+
+class RepoListResponse(BaseModel):
+    isSuccess: bool
+    code: str
+    message: str
+    result: List[Dict[str, Any]]
+
+class CacheStatsResponse(BaseModel):
+    isSuccess: bool
+    code: str
+    message: str
+    result: Dict[str, Any]
+
+# 초기화 완료 + Qdrant 연결 체크 함수 (공유 비동기 클라이언트 사용)
 async def readiness():
+    if not is_ready():
+        return False
     try:
-        client = QdrantClient(host=settings.qdrant_host, port=settings.qdrant_port)
-        client.get_collections()
+        await asyncio.wait_for(rag_service.async_client.get_collections(), timeout=settings.search_timeout_seconds)
         return True
     except Exception as e:
         traceback.print_exc()
@@ -55,111 +119,587 @@ async def liveness():
 app.add_api_route("/health/liveness", health([liveness]))
 app.add_api_route("/health/readiness", health([readiness]))
 
+# Prometheus 메트릭 (METRICS_ENABLED일 때만 노출)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+if settings.metrics_enabled:
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+
 # 질문 API
+# repo: 검색할 레포 ("owner/repo" 또는 "owner/repo@branch", 생략하면 DEFAULT_REPO 또는 인덱싱한 유일한 레포)
 @app.post("/api/logs/summary", response_model=QuestionResponse)
-async def analyze_logs(request: QuestionRequest):
+async def analyze_logs(request: QuestionRequest, stream: bool = False, repo: Optional[str] = None):
     try:
-        # 프롬프트 타입 "log_summary" or "github_issue"
-        # 체인과 retriever 동시 획득
-        chain, retriever = get_chain_and_retriever("log_summary")
-
-        # 1. 각 로그별로 N개씩 유사 코드 검색
-        all_relevant_docs = await get_relevant_docs_for_logs(retriever, request.log)
-
-        # 2. context/question 딕셔너리 생성
-        inputs = build_chain_inputs(all_relevant_docs, request.log)
-
-        # 로그 출력
-        # log_relevant_docs(all_relevant_docs)
-        # log_llm_prompt(inputs["context"], inputs["question"])
+        # stream=true면 검색 결과 → 부분 결과 → 최종 응답을 SSE로 전송 (스트림 시작 전 오류는 일반 응답과 같은 상태 코드)
+        if stream:
+            return stream_response("log_summary", request.log, "로그 요약을 완료했습니다.", repo)
 
-        # 3. 체인 실행
-        result = await asyncio.to_thread(chain.invoke, inputs)
+        # 프롬프트 타입 "log_summary" or "github_issue"
+        result = await run_log_analysis("log_summary", request.log, repo)
 
         return QuestionResponse(
             isSuccess=True,
             code="2000",
             message="로그 요약을 완료했습니다.",
-            result=[QuestionResponseItem(message=result.model_dump())]
+            result=[QuestionResponseItem(message=result)]
         )
 
     except ValueError as ve:
         raise CustomException(code="4001", message=f"입력값 오류: {str(ve)}", status_code=400)
 
+    except ServiceNotReadyError as e:
+        raise not_ready_exception(e)
+
+    except LLMResponseError as e:
+        raise CustomException(code="5020", message=str(e), status_code=502)
+
+    except asyncio.TimeoutError:
+        raise CustomException(code="5040", message="처리 시간이 초과되었습니다.", status_code=504)
+
     except Exception as e:
         raise CustomException(code="5000", message=f"알 수 없는 오류: {str(e)}", status_code=500)
 
 @app.post("/api/logs/issues", response_model=QuestionResponse)
-async def analyze_logs(request: QuestionRequest):
+async def analyze_logs(request: QuestionRequest, stream: bool = False, repo: Optional[str] = None):
     try:
-        # 프롬프트 타입 "log_summary" or "github_issue"
-        # 체인과 retriever 동시 획득
-        chain, retriever = get_chain_and_retriever("github_issue")
+        # stream=true면 검색 결과 → 부분 결과 → 최종 응답을 SSE로 전송 (스트림 시작 전 오류는 일반 응답과 같은 상태 코드)
+        if stream:
+            return stream_response("github_issue", request.log, "이슈 작성을 완료했습니다.", repo)
 
-        # 1. 각 로그별로 N개씩 유사 코드 검색
-        all_relevant_docs = await get_relevant_docs_for_logs(retriever, request.log)
-
-        # 2. context/question 딕셔너리 생성
-        inputs = build_chain_inputs(all_relevant_docs, request.log)
-
-        # 로그 출력
-        # log_relevant_docs(all_relevant_docs)
-        # log_llm_prompt(inputs["context"], inputs["question"])
-
-        # 3. 체인 실행
-        result = await asyncio.to_thread(chain.invoke, inputs)
+        # 프롬프트 타입 "log_summary" or "github_issue"
+        result = await run_log_analysis("github_issue", request.log, repo)
 
         return QuestionResponse(
                 isSuccess=True,
                 code="2000",
                 message="이슈 작성을 완료했습니다.",
-                result=[QuestionResponseItem(message=result.model_dump())]
+                result=[QuestionResponseItem(message=result)]
         )
 
     except ValueError as ve:
         raise CustomException(code="4001", message=f"입력값 오류: {str(ve)}", status_code=400)
 
+    except ServiceNotReadyError as e:
+        raise not_ready_exception(e)
+
+    except LLMResponseError as e:
+        raise CustomException(code="5020", message=str(e), status_code=502)
+
+    except asyncio.TimeoutError:
+        raise CustomException(code="5040", message="처리 시간이 초과되었습니다.", status_code=504)
+
     except Exception as e:
         raise CustomException(code="5000", message=f"알 수 없는 오류: {str(e)}", status_code=500)
 
-# 임베딩 API
-@app.post("/api/codes/embedding", response_model=EmbeddingResponse)
+# 배치 질문 API (항목별 성공/실패는 각 항목의 isSuccess/code로 전달)
+@app.post("/api/logs/summary/batch", response_model=BatchQuestionResponse)
+async def analyze_logs_batch(request: BatchQuestionRequest, repo: Optional[str] = None):
+    return await batch_response("log_summary", request.incidents, "로그 요약을 완료했습니다.", repo)
+
+@app.post("/api/logs/issues/batch", response_model=BatchQuestionResponse)
+async def analyze_issues_batch(request: BatchQuestionRequest, repo: Optional[str] = None):
+    return await batch_response("github_issue", request.incidents, "이슈 작성을 완료했습니다.", repo)
+
+# 임베딩 API (작업을 등록하고 바로 작업 ID를 반환, 실제 임베딩은 워커 스레드에서 수행)
+@app.post("/api/codes/embedding", response_model=EmbeddingJobResponse, status_code=202)
 async def embed_codes(request: EmbeddingRequest):
     try:
-        embed_documents(request.github_url)
+        job, created = job_manager.submit(request.github_url, request.branch)
+
+        return EmbeddingJobResponse(
+            isSuccess=True,
+            code="2021",
+            message=(
+                f"{request.github_url} 주소 코드의 임베딩 작업을 등록했습니다."
+                if created else f"{request.github_url} 주소 코드의 임베딩 작업이 이미 진행 중입니다."
+            ),
+            result=job.to_dict()
+        )
+
+    except ValueError as ve:
+        raise CustomException(code="4001", message=f"입력값 오류: {str(ve)}", status_code=400)
+
+    except Exception as e:
+        traceback.print_exc()
+        raise CustomException(code="5000", message=f"알 수 없는 오류: {str(e)}", status_code=500)
+
+# 임베딩 작업 목록 조회 API
+@app.get("/api/codes/embedding/jobs", response_model=EmbeddingJobListResponse)
+async def list_embedding_jobs():
+    return EmbeddingJobListResponse(
+        isSuccess=True,
+        code="2000",
+        message="임베딩 작업 목록 조회를 완료했습니다.",
+        result=[job.to_dict() for job in job_manager.list()]
+    )
+
+# 임베딩 작업 상태/진행률 조회 API
+@app.get("/api/codes/embedding/jobs/{job_id}", response_model=EmbeddingJobResponse)
+async def get_embedding_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise CustomException(code="4004", message=f"존재하지 않는 작업입니다: {job_id}", status_code=404)
+
+    return EmbeddingJobResponse(
+        isSuccess=True,
+        code="2000",
+        message="임베딩 작업 조회를 완료했습니다.",
+        result=job.to_dict()
+    )
+
+# 임베딩 작업 취소 API
+@app.delete("/api/codes/embedding/jobs/{job_id}", response_model=EmbeddingJobResponse)
+async def cancel_embedding_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise CustomException(code="4004", message=f"존재하지 않는 작업입니다: {job_id}", status_code=404)
+
+    return EmbeddingJobResponse(
+        isSuccess=True,
+        code="2000",
+        message="임베딩 작업 취소를 요청했습니다.",
+        result=job.to_dict()
+    )
+
+# 인덱싱된 레포 목록 조회 API (분석 API의 repo 파라미터에 "repo" 값을 사용)
+@app.get("/api/codes/repos", response_model=RepoListResponse)
+async def list_repos():
+    return RepoListResponse(
+        isSuccess=True,
+        code="2000",
+        message="인덱싱된 레포 목록 조회를 완료했습니다.",
+        result=[
+            {
+                "repo": repo_name,
+                "githubUrl": repo_state.get("github_url"),
+                "branch": repo_state.get("branch"),
+                "commit": repo_state.get("commit"),
+                "collection": repo_state.get("collection"),
+                "indexedAt": repo_state.get("indexed_at"),
+            }
+            for repo_name, repo_state in get_index_state().items()
+            if "alias" in repo_state
+        ]
+    )
+
+# 임베딩 롤백 API (레포의 alias를 직전 버전 컬렉션으로 되돌림)
+@app.post("/api/codes/embedding/rollback", response_model=EmbeddingResponse)
+async def rollback_embedding(repo: Optional[str] = None):
+    from collection_manager import rollback_alias
+
+    try:
+        ensure_ready()
+        alias, _ = resolve_repo(repo)
+        collection_name = await asyncio.to_thread(rollback_alias, rag_service.client, alias)
+        # 인덱스 버전이 바뀌어 롤백 전 인덱스로 만든 응답 캐시는 더 이상 조회되지 않음
+        await asyncio.to_thread(record_rollback, alias, collection_name)
 
         return EmbeddingResponse(
             isSuccess=True,
-            code="2001",
-            message=f"{request.github_url} 주소 코드의 임베딩을 완료했습니다."
+            code="2002",
+            message=f"{collection_name} 컬렉션으로 롤백을 완료했습니다."
         )
 
+    except ValueError as ve:
+        raise CustomException(code="4001", message=f"입력값 오류: {str(ve)}", status_code=400)
+
+    except ServiceNotReadyError as e:
+        raise not_ready_exception(e)
+
     except Exception as e:
         traceback.print_exc()
         raise CustomException(code="5000", message=f"알 수 없는 오류: {str(e)}", status_code=500)
 
+# 캐시 적중률 조회 API
+@app.get("/api/cache/stats", response_model=CacheStatsResponse)
+async def cache_stats():
+    embedding_cache = get_embedding_cache()
+    return CacheStatsResponse(
+        isSuccess=True,
+        code="2000",
+        message="캐시 통계 조회를 완료했습니다.",
+        result={
+            "embedding": embedding_cache.stats() if embedding_cache else None,
+            "response": response_cache.stats() if settings.response_cache_enabled else None,
+        }
+    )
+
+
+# 로그 분석 공통 처리: 응답 캐시 조회 → 코드 검색 → 체인 실행 → 응답 캐시 저장
+async def run_log_analysis(prompt_type: str, logs: List[Dict[str, Any]], repo: Optional[str] = None) -> Dict[str, Any]:
+    # 같은 지문의 로그를 묶음
+    ensure_ready()
+    log_groups = group_logs(logs)
+    # 검색할 레포의 alias와 인덱스 버전
+    collection_name, index_version = resolve_repo(repo)
+
+    # 0. 같은 로그/인덱스 버전/모델 설정으로 분석한 결과가 있으면 재사용
+    cached, cache_entry = await lookup_response_cache(prompt_type, log_groups, index_version)
+    if cached is not None:
+        return cached
+
+    # 레포별 retriever 획득 (LLM 호출은 llm_runner가 시작 시 만들어 둔 프롬프트/LLM으로 수행)
+    _, retriever = get_chain_and_retriever(prompt_type, collection_name)
+    started_at = time.perf_counter()
+
+    # 1. 고유 로그별로 N개씩 유사 코드 검색
+    all_relevant_docs = await get_relevant_docs_for_logs(retriever, log_groups)
+    retrieved_at = time.perf_counter()
+
+    # 2. context/question 딕셔너리 생성
+    inputs = build_chain_inputs(all_relevant_docs, log_groups, prompt_type)
+
+    # 로그 출력
+    # log_relevant_docs([doc for docs in all_relevant_docs for doc in docs])
+    # log_llm_prompt(inputs["context"], inputs["question"])
+
+    # 3. LLM 호출 (검색된 context를 그대로 프롬프트에 사용, 재시도/헤징/대체 모델은 LLM_TIMEOUT_SECONDS 안에서)
+    result, model_name = await invoke_llm(prompt_type, inputs)
+    finished_at = time.perf_counter()
+    logger.info(
+        f"{prompt_type} 처리 시간: 검색 {(retrieved_at - started_at) * 1000:.1f}ms, "
+        f"LLM {(finished_at - retrieved_at) * 1000:.1f}ms, 전체 {(finished_at - started_at) * 1000:.1f}ms"
+    )
+    observe_analysis(prompt_type, "sync", finished_at - started_at)
+
+    store_response_cache(cache_entry, result, model_name)
+    return result
+
+
+# 스트리밍 로그 분석: ("retrieval", 검색 결과) → ("partial", 부분 결과)... → ("result", 검증된 최종 결과)
+# 초기화 확인/로그 묶기/레포 확인은 stream_response에서 응답을 시작하기 전에 수행
+async def stream_log_analysis(prompt_type: str, log_groups: List[LogGroup], collection_name: str, index_version: str):
+    cached, cache_entry = await lookup_response_cache(prompt_type, log_groups, index_version)
+    if cached is not None:
+        yield "retrieval", {"cached": True, "documents": []}
+        yield "result", cached
+        return
+
+    chain, retriever = get_chain_and_retriever(prompt_type, collection_name)
+    started_at = time.perf_counter()
+
+    all_relevant_docs = await get_relevant_docs_for_logs(retriever, log_groups)
+    inputs = build_chain_inputs(all_relevant_docs, log_groups, prompt_type)
+    retrieved_at = time.perf_counter()
+    yield "retrieval", {"cached": False, "documents": summarize_docs(all_relevant_docs)}
+
+    # 모델이 만드는 JSON을 파싱되는 만큼 전송 (같은 부분 결과는 한 번만)
+    # LLM 스트림은 동시 호출 슬롯과 제한 시간을 가진 태스크가 큐로 넘겨, 클라이언트가 느리게 읽어도 슬롯을 잡고 있지 않음
+    message, partial, first_token_at = None, None, None
+    deadline = get_deadline()
+    chunks = asyncio.Queue()
+    producer = asyncio.create_task(produce_llm_stream(chain, inputs, deadline, chunks))
+    try:
+        done = False
+        while not done:
+            # 클라이언트가 읽는 동안 쌓인 청크는 합쳐서 한 번만 파싱
+            received = [await chunks.get()]
+            while not chunks.empty():
+                received.append(chunks.get_nowait())
+            for chunk in received:
+                if chunk is STREAM_END:
+                    done = True
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                message = chunk if message is None else message + chunk
+            parsed = parse_partial(message.content) if message is not None else None
+            if parsed and parsed != partial:
+                partial = parsed
+                yield "partial", partial
+    except Exception as e:
+        # 첫 토큰 전 일시적 오류면 남은 시간 안에서 일반 호출(재시도/헤징/대체 모델)로 전환
+        if message is not None or not is_retryable(e) or get_remaining(deadline) <= 0:
+            raise
+        logger.warning(f"{prompt_type} 스트리밍 시작 실패, 일반 호출로 전환: {e!r}")
+        result, model_name = await invoke_llm(prompt_type, inputs, deadline)
+    else:
+        record_llm_usage(prompt_type, message.usage_metadata if message else None)
+        # 출력 형식과 맞지 않으면 JSON 부분 복구 또는 재요청
+        messages = rag_service.prompts[prompt_type].invoke(inputs).to_messages()
+        model_name = "primary"
+        result = await parse_response(prompt_type, messages, message or AIMessage(content=""), model_name, deadline)
+    finally:
+        producer.cancel()
+    finished_at = time.perf_counter()
+    logger.info(
+        f"{prompt_type} 스트리밍 처리 시간: 검색 {(retrieved_at - started_at) * 1000:.1f}ms, "
+        f"첫 토큰 {((first_token_at or finished_at) - retrieved_at) * 1000:.1f}ms, "
+        f"전체 {(finished_at - started_at) * 1000:.1f}ms"
+    )
+    observe_analysis(prompt_type, "stream", finished_at - started_at)
+
+    store_response_cache(cache_entry, result, model_name)
+    yield "result", result
+
+
+STREAM_END = object()
+
+# LLM 스트림을 큐로 전달 (끝나면 STREAM_END, 실패/제한 시간 초과면 예외를 넣음)
+async def produce_llm_stream(chain, inputs: Dict[str, str], deadline: float, chunks: asyncio.Queue):
+    try:
+        async with llm_semaphore:
+            with track_stage("llm"):
+                async with asyncio.timeout_at(deadline):
+                    async for chunk in chain.astream(inputs):
+                        chunks.put_nowait(chunk)
+        chunks.put_nowait(STREAM_END)
+    except Exception as e:
+        chunks.put_nowait(e)
+
+# SSE 응답 (최종 결과와 오류는 일반 응답과 같은 형식으로 전송)
+# 초기화 전/잘못된 입력/없는 레포는 스트림을 시작하기 전에 예외로 올려 일반 응답과 같은 상태 코드로 응답
+def stream_response(prompt_type: str, logs: List[Dict[str, Any]], message: str, repo: Optional[str] = None) -> StreamingResponse:
+    ensure_ready()
+    log_groups = group_logs(logs)
+    collection_name, index_version = resolve_repo(repo)
+    get_chain_and_retriever(prompt_type, collection_name)
+
+    async def events():
+        try:
+            async for event, data in stream_log_analysis(prompt_type, log_groups, collection_name, index_version):
+                if event == "result":
+                    data = QuestionResponse(
+                        isSuccess=True,
+                        code="2000",
+                        message=message,
+                        result=[QuestionResponseItem(message=data)]
+                    ).model_dump()
+                yield format_sse(event, data)
+
+        except Exception as e:
+            yield format_sse("error", error_body(e))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # 프록시(nginx 등)가 이벤트를 모아서 보내지 않도록
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# 초기화 전 요청 (로드밸런서가 readiness를 보고 다른 인스턴스로 보내도록 503)
+def not_ready_exception(e: ServiceNotReadyError) -> CustomException:
+    return CustomException(code="5030", message=str(e), status_code=503)
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# 예외를 일반 API와 같은 오류 응답 형식으로 (스트리밍/배치 항목용)
+def error_body(e: Exception) -> Dict[str, Any]:
+    if isinstance(e, ValueError):
+        code, message = "4001", f"입력값 오류: {str(e)}"
+    elif isinstance(e, ServiceNotReadyError):
+        code, message = "5030", str(e)
+    elif isinstance(e, LLMResponseError):
+        code, message = "5020", str(e)
+    elif isinstance(e, asyncio.TimeoutError):
+        code, message = "5040", "처리 시간이 초과되었습니다."
+    else:
+        traceback.print_exception(e)
+        code, message = "5000", f"알 수 없는 오류: {str(e)}"
+    return {"isSuccess": False, "code": code, "message": message, "result": []}
+
+# 스트리밍 첫 이벤트로 보내는 검색된 코드 위치 (중복 제거)
+def summarize_docs(relevant_docs: List[List[Any]]) -> List[Dict[str, Any]]:
+    documents, seen = [], set()
+    for docs in relevant_docs:
+        for doc in docs:
+            metadata = doc.metadata
+            if metadata.get("_id") in seen:
+                continue
+            seen.add(metadata.get("_id"))
+            documents.append({
+                "path": metadata.get("path"),
+                "symbol": metadata.get("symbol"),
+                "startLine": metadata.get("start_line"),
+                "endLine": metadata.get("end_line"),
+                "score": metadata.get("_score"),
+            })
+    return documents
+
+
+# 배치 로그 분석: 같은 지문 조합의 장애는 한 번만 분석, 검색은 한 번에, LLM 호출은 동시 호출 수 제한 안에서 병렬로
+# 반환: 입력 순서대로 결과 dict 또는 예외
+async def run_batch_log_analysis(prompt_type: str, incidents: List[List[Dict[str, Any]]], repo: Optional[str] = None) -> List[Any]:
+    if len(incidents) > settings.batch_max_incidents:
+        raise ValueError(f"한 번에 최대 {settings.batch_max_incidents}개까지 분석할 수 있습니다.")
+    ensure_ready()
+    collection_name, index_version = resolve_repo(repo)
+    _, retriever = get_chain_and_retriever(prompt_type, collection_name)
+    started_at = time.perf_counter()
+
+    keys, unique_incidents = [], {}
+    for logs in incidents:
+        log_groups = group_logs(logs)
+        key = tuple(sorted({log_group.fingerprint for log_group in log_groups}))
+        keys.append(key)
+        unique_incidents.setdefault(key, log_groups)
+
+    # 0. 응답 캐시 조회 (정확한 키 조회 후 못 찾은 장애만 모아 유사 응답 조회)
+    outcomes, pending = {}, {}
+    lookups = await lookup_response_cache_batch(prompt_type, list(unique_incidents.values()), index_version)
+    for (key, log_groups), lookup in zip(unique_incidents.items(), lookups):
+        if isinstance(lookup, Exception):
+            outcomes[key] = lookup
+            continue
+        cached, cache_entry = lookup
+        if cached is not None:
+            outcomes[key] = cached
+        else:
+            pending[key] = (log_groups, cache_entry)
+
+    # 1. 분석할 장애들의 고유 로그를 모아 한 번에 검색
+    distinct_groups = {}
+    for log_groups, _ in pending.values():
+        for log_group in log_groups:
+            distinct_groups.setdefault(log_group.fingerprint, log_group)
+    try:
+        docs_by_fingerprint = dict(zip(distinct_groups, await retriever.aretrieve_batch(list(distinct_groups.values()))))
+    except Exception as e:
+        # 검색이 실패하면 분석 대기 중인 항목 모두 실패 처리
+        outcomes.update((key, e) for key in pending)
+        pending = {}
+    retrieved_at = time.perf_counter()
+
+    # 2. 장애별 LLM 호출 (장애마다 LLM_TIMEOUT_SECONDS 안에서 재시도/헤징/대체 모델)
+    async def analyze(log_groups, cache_entry):
+        inputs = build_chain_inputs([docs_by_fingerprint[log_group.fingerprint] for log_group in log_groups], log_groups, prompt_type)
+        result, model_name = await invoke_llm(prompt_type, inputs)
+        store_response_cache(cache_entry, result, model_name)
+        return result
+
+    results = await asyncio.gather(*(analyze(*item) for item in pending.values()), return_exceptions=True)
+    outcomes.update(zip(pending, results))
+    finished_at = time.perf_counter()
+    logger.info(
+        f"{prompt_type} 배치 처리: 장애 {len(incidents)}개 (고유 {len(unique_incidents)}개, 분석 {len(pending)}개, "
+        f"고유 로그 {len(distinct_groups)}개), 검색 {(retrieved_at - started_at) * 1000:.1f}ms, "
+        f"전체 {(finished_at - started_at) * 1000:.1f}ms"
+    )
+    observe_analysis(prompt_type, "batch", finished_at - started_at)
+    return [outcomes[key] for key in keys]
+
+
+# 생성 중인 JSON 문자열에서 지금까지 완성된 필드 (아직 파싱할 수 없으면 None)
+def parse_partial(text: str):
+    try:
+        return parse_partial_json(text)
+    except ValueError:
+        return None
 
-async def get_relevant_docs_for_logs(retriever, logs: List[Dict[str, Any]]) -> List[Any]:
-    async def async_invoke(log):
-        log_str = json.dumps(log, ensure_ascii=False, indent=2)
-        # retriever.invoke를 비동기로 실행
-        return await asyncio.to_thread(retriever.invoke, log_str)
 
-    # 각 로그에 대해 태스크 생성
-    tasks = [async_invoke(log) for log in logs]
-    results = await asyncio.gather(*tasks)
+async def batch_response(prompt_type: str, incidents: List[List[Dict[str, Any]]], message: str, repo: Optional[str] = None) -> BatchQuestionResponse:
+    try:
+        outcomes = await run_batch_log_analysis(prompt_type, incidents, repo)
 
-    # 결과를 List[List[문서]]로 반환
-    return [doc for sublist in results for doc in sublist]
+    except ValueError as ve:
+        raise CustomException(code="4001", message=f"입력값 오류: {str(ve)}", status_code=400)
 
+    except ServiceNotReadyError as e:
+        raise not_ready_exception(e)
 
-def build_chain_inputs(all_relevant_docs: List[Any], logs: List[Dict[str, Any]]) -> Dict[str, str]:
-    # 코드 내용 합치기
-    context_str = "\n\n---\n\n".join([doc.page_content for doc in all_relevant_docs])
-    # 로그 전체를 JSON 문자열로
-    log_str = json.dumps(logs, ensure_ascii=False, indent=2)
+    except Exception as e:
+        traceback.print_exc()
+        raise CustomException(code="5000", message=f"알 수 없는 오류: {str(e)}", status_code=500)
+
+    items = [
+        QuestionResponse(**error_body(outcome)) if isinstance(outcome, Exception)
+        else QuestionResponse(isSuccess=True, code="2000", message=message, result=[QuestionResponseItem(message=outcome)])
+        for outcome in outcomes
+    ]
+    return BatchQuestionResponse(
+        isSuccess=True,
+        code="2000",
+        message=f"{len(items)}건 중 {sum(item.isSuccess for item in items)}건 분석을 완료했습니다.",
+        result=items
+    )
+
+
+# 응답 캐시 조회 (miss면 저장할 때 쓸 (key, scope, 로그 벡터)를 함께 반환)
+async def lookup_response_cache(prompt_type: str, log_groups: List[LogGroup], index_version: str):
+    if not settings.response_cache_enabled:
+        return None, None
+    log_vector = None
+    scope = response_cache.make_scope(prompt_type, index_version)
+    cache_key = response_cache.make_key(scope, [log_group.fingerprint for log_group in log_groups])
+    cached = response_cache.get(cache_key)
+    if cached is None and response_cache.similarity_threshold > 0:
+        log_vector = await embed_log_groups(log_groups)
+        cached = response_cache.find_similar(scope, log_vector)
+    return cached, (cache_key, scope, log_vector)
+
+# 여러 장애의 응답 캐시 조회 (유사 응답 조회용 임베딩은 정확한 키로 못 찾은 장애만 모아 한 번에 요청)
+# 반환: 장애별 (캐시된 응답, cache_entry), 유사 응답 조회가 실패하면 못 찾은 장애 자리에 그 예외
+async def lookup_response_cache_batch(prompt_type: str, incidents: List[List[LogGroup]], index_version: str) -> List[Any]:
+    if not settings.response_cache_enabled:
+        return [(None, None)] * len(incidents)
+    scope = response_cache.make_scope(prompt_type, index_version)
+    lookups = []
+    for log_groups in incidents:
+        cache_key = response_cache.make_key(scope, [log_group.fingerprint for log_group in log_groups])
+        lookups.append((response_cache.get(cache_key), (cache_key, scope, None)))
+    missed = [index for index, (cached, _) in enumerate(lookups) if cached is None]
+    if not missed or response_cache.similarity_threshold <= 0:
+        return lookups
 
-    return {
-        "context": context_str,
-        "question": log_str
-    }
\ No newline at end of file
+    try:
+        log_vectors = await embed_incidents([incidents[index] for index in missed])
+    except Exception as e:
+        for index in missed:
+            lookups[index] = e
+        return lookups
+    for index, log_vector in zip(missed, log_vectors):
+        cache_key = lookups[index][1][0]
+        lookups[index] = (response_cache.find_similar(scope, log_vector), (cache_key, scope, log_vector))
+    return lookups
+
+# 대체 모델 결과는 저장하지 않음 (기본 모델이 복구되면 다시 분석)
+def store_response_cache(cache_entry, result: Dict[str, Any], model_name: str = "primary"):
+    if cache_entry is None or model_name != "primary":
+        return
+    cache_key, scope, log_vector = cache_entry
+    response_cache.put(cache_key, scope, result, log_vector)
+
+
+# 유사 응답 조회용 로그 벡터 (고유 로그 질의 임베딩의 평균, 검색 단계에서 임베딩 캐시에 적중)
+async def embed_log_groups(log_groups: List[LogGroup]) -> List[float]:
+    return (await embed_incidents([log_groups]))[0]
+
+# 여러 장애의 로그 벡터 (장애들의 고유 로그 질의를 모아 임베딩 요청 1회)
+async def embed_incidents(incidents: List[List[LogGroup]]) -> List[List[float]]:
+    queries = {}
+    for log_groups in incidents:
+        for log_group in log_groups:
+            queries.setdefault(log_group.fingerprint, log_group.query())
+    vectors = await asyncio.wait_for(
+        rag_service.embedding_model.aembed_documents(list(queries.values())),
+        timeout=settings.embedding_timeout_seconds,
+    )
+    vector_by_fingerprint = dict(zip(queries, vectors))
+    return [
+        [sum(values) / len(log_groups) for values in zip(*(vector_by_fingerprint[log_group.fingerprint] for log_group in log_groups))]
+        for log_groups in incidents
+    ]
+
+
+async def get_relevant_docs_for_logs(retriever, log_groups: List[LogGroup]) -> List[List[Any]]:
+    async def async_invoke(log_group):
+        # 스택 프레임 심볼 조회 + 벡터 검색 (지문별로 한 번만 검색)
+        return await retriever.aretrieve(log_group)
+
+    # 고유 로그에 대해 태스크 생성
+    tasks = [async_invoke(log_group) for log_group in log_groups]
+
+    # 결과를 List[List[문서]]로 반환 (고유 로그 순서와 같음, 중복 제거/재정렬은 context 구성 단계에서 수행)
+    return await asyncio.gather(*tasks)
+
+
+def build_chain_inputs(relevant_docs: List[List[Any]], log_groups: List[LogGroup], prompt_type: str) -> Dict[str, str]:
+    # 프롬프트 타입별 토큰 예산 안에서 압축한 로그와 재정렬한 코드 청크로 context/question 구성
+    with track_stage("context_build"):
+        return build_prompt_context(relevant_docs, log_groups, get_token_budget(prompt_type), settings.log_token_ratio)
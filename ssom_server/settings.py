@@ -6,10 +6,63 @@ class Settings(BaseSettings):
     qdrant_host: str = Field(..., env="QDRANT_HOST")
     qdrant_port: int = Field(6333, env="QDRANT_PORT")
     embedding_model: str = Field("text-embedding-3-small", env="EMBEDDING_MODEL")
+    embedding_dimensions: int = Field(0, env="EMBEDDING_DIMENSIONS")
     llm_model: str = Field("gpt-4.1-mini", env="LLM_MODEL")
     llm_temperature: float = Field(0.2, env="LLM_TEMPERATURE")
+    llm_fallback_model: str = Field("", env="LLM_FALLBACK_MODEL")
     retriever_top_k: int = Field(3, env="RETRIEVER_TOP_K")
+    symbol_search_enabled: bool = Field(True, env="SYMBOL_SEARCH_ENABLED")
+    log_summary_token_budget: int = Field(8000, env="LOG_SUMMARY_TOKEN_BUDGET")
+    github_issue_token_budget: int = Field(6000, env="GITHUB_ISSUE_TOKEN_BUDGET")
+    log_token_ratio: float = Field(0.3, env="LOG_TOKEN_RATIO")
+    embedding_timeout_seconds: float = Field(10.0, env="EMBEDDING_TIMEOUT_SECONDS")
+    search_timeout_seconds: float = Field(5.0, env="SEARCH_TIMEOUT_SECONDS")
+    llm_timeout_seconds: float = Field(90.0, env="LLM_TIMEOUT_SECONDS")
+    search_max_concurrency: int = Field(32, env="SEARCH_MAX_CONCURRENCY")
+    llm_max_concurrency: int = Field(16, env="LLM_MAX_CONCURRENCY")
+    llm_attempt_timeout_seconds: float = Field(20.0, env="LLM_ATTEMPT_TIMEOUT_SECONDS")
+    llm_max_retries: int = Field(2, env="LLM_MAX_RETRIES")
+    llm_retry_backoff_seconds: float = Field(0.5, env="LLM_RETRY_BACKOFF_SECONDS")
+    llm_hedge_after_seconds: float = Field(0.0, env="LLM_HEDGE_AFTER_SECONDS")
+    llm_parse_retries: int = Field(1, env="LLM_PARSE_RETRIES")
+    startup_backoff_max_seconds: float = Field(30.0, env="STARTUP_BACKOFF_MAX_SECONDS")
+    batch_max_incidents: int = Field(100, env="BATCH_MAX_INCIDENTS")
     collection_name: str = Field("java-files", env="COLLECTION_NAME")
+    default_repo: str = Field("", env="DEFAULT_REPO")
+    embedding_job_workers: int = Field(1, env="EMBEDDING_JOB_WORKERS")
+    embedding_batch_tokens: int = Field(100000, env="EMBEDDING_BATCH_TOKENS")
+    embedding_batch_size: int = Field(256, env="EMBEDDING_BATCH_SIZE")
+    embedding_concurrency: int = Field(4, env="EMBEDDING_CONCURRENCY")
+    embedding_max_retries: int = Field(6, env="EMBEDDING_MAX_RETRIES")
+    embedding_cache_enabled: bool = Field(True, env="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_path: str = Field("./cache/embeddings.sqlite3", env="EMBEDDING_CACHE_PATH")
+    embedding_cache_max_entries: int = Field(50000, env="EMBEDDING_CACHE_MAX_ENTRIES")
+    response_cache_enabled: bool = Field(True, env="RESPONSE_CACHE_ENABLED")
+    response_cache_ttl_seconds: int = Field(3600, env="RESPONSE_CACHE_TTL_SECONDS")
+    response_cache_max_entries: int = Field(1000, env="RESPONSE_CACHE_MAX_ENTRIES")
+    response_cache_similarity_threshold: float = Field(0.0, env="RESPONSE_CACHE_SIMILARITY_THRESHOLD")
+    chunk_max_chars: int = Field(4000, env="CHUNK_MAX_CHARS")
+    repo_include_globs: str = Field("**/*.java", env="REPO_INCLUDE_GLOBS")
+    repo_exclude_globs: str = Field(
+        "**/src/test/**,**/test/**,**/tests/**,**/build/**,**/target/**,**/generated/**,**/generated-sources/**",
+        env="REPO_EXCLUDE_GLOBS",
+    )
+    repo_clone_depth: int = Field(1, env="REPO_CLONE_DEPTH")
+    git_timeout_seconds: float = Field(600.0, env="GIT_TIMEOUT_SECONDS")
+    file_read_workers: int = Field(8, env="FILE_READ_WORKERS")
+    max_source_file_bytes: int = Field(1000000, env="MAX_SOURCE_FILE_BYTES")
+    collection_retention_seconds: int = Field(86400, env="COLLECTION_RETENTION_SECONDS")
+    vector_quantization: str = Field("none", env="VECTOR_QUANTIZATION")
+    quantization_always_ram: bool = Field(True, env="QUANTIZATION_ALWAYS_RAM")
+    quantization_rescore: bool = Field(True, env="QUANTIZATION_RESCORE")
+    quantization_oversampling: float = Field(2.0, env="QUANTIZATION_OVERSAMPLING")
+    vector_on_disk: bool = Field(False, env="VECTOR_ON_DISK")
+    hnsw_on_disk: bool = Field(False, env="HNSW_ON_DISK")
+    hnsw_m: int = Field(16, env="HNSW_M")
+    hnsw_ef_construct: int = Field(100, env="HNSW_EF_CONSTRUCT")
+    hnsw_ef: int = Field(0, env="HNSW_EF")
+    metrics_enabled: bool = Field(True, env="METRICS_ENABLED")
+    otel_enabled: bool = Field(False, env="OTEL_ENABLED")
 
     class Config:
         env_file = ".env"
@@ -19,7 +72,7 @@ class Settings(BaseSettings):
     @classmethod
     def empty_string_as_default(cls, v, info):
         if v is None or (isinstance(v, str) and v.strip() == ""):
-            return info.default if info.default is not None else None
+            return cls.model_fields[info.field_name].default
         return v
 
     @field_validator("openai_api_key", "qdrant_host", mode="before")
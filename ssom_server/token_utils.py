@@ -0,0 +1,20 @@
+from functools import lru_cache
+from logging_utils import logger
+
+
+# tiktoken 인코딩 (인코딩 파일을 받을 수 없는 환경이면 None)
+@lru_cache(maxsize=1)
+def get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken 인코딩을 불러올 수 없어 문자 수 기반으로 토큰을 추정함: {e}")
+        return None
+
+# 텍스트 토큰 수 (tiktoken이 없으면 보수적으로 3문자당 1토큰으로 추정)
+def estimate_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // 3 + 1
+    return len(encoding.encode(text, disallowed_special=()))
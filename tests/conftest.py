@@ -0,0 +1,12 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "ssom_server"), str(ROOT / "benchmarks")]
+
+# settings.py 필수 값 (테스트는 OpenAI/Qdrant에 연결하지 않음)
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("QDRANT_HOST", "localhost")
+# metrics 모듈 import 시 임베딩 캐시 SQLite 파일이 작업 디렉토리에 생기지 않도록
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
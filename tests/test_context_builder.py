@@ -0,0 +1,81 @@
+"""context_builder 토큰 예산/재정렬과 rag_service RRF 결합 확인
+
+    python -m pytest tests
+"""
+import json
+from langchain_core.documents import Document
+
+from context_builder import build_code_context, build_log_question, build_prompt_context, rerank_documents
+from log_normalizer import LogGroup
+from rag_service import fuse_results
+from token_utils import estimate_tokens
+
+
+def doc(content, score=0.0, **metadata) -> Document:
+    return Document(page_content=content, metadata={"_id": content, "_score": score, **metadata})
+
+def log_group(message, count=1, frames=()) -> LogGroup:
+    return LogGroup(
+        fingerprint=message, log={"message": message, "timestamp": "2024-05-01T10:00:00Z"},
+        normalized={"message": message}, frames=list(frames), frame_lines=[None] * len(frames), count=count,
+    )
+
+
+def test_fuse_results_ranks_documents_found_by_both_searches_first():
+    symbol = [doc("a"), doc("b")]
+    dense = [doc("c"), doc("b")]
+    assert [item.page_content for item in fuse_results(symbol, dense)] == ["b", "a", "c"]
+
+
+def test_rerank_prefers_stack_frame_method_over_dense_score():
+    groups = [log_group("failed", frames=["com.x.OrderService.place", "com.x.Controller.post"])]
+    results = [[
+        doc("similar but unrelated", score=0.9, package="com.y", class_name="Other"),
+        doc("class fields", score=0.5, package="com.x", class_name="OrderService"),
+        doc("place body", score=0.5, package="com.x", class_name="OrderService", method="place"),
+    ]]
+    assert [item.page_content for item in rerank_documents(results, groups)] == [
+        "place body", "class fields", "similar but unrelated",
+    ]
+
+def test_rerank_deduplicates_and_boosts_chunks_shared_by_frequent_logs():
+    groups = [log_group("a", count=50), log_group("b", count=1)]
+    shared = doc("shared", score=0.5, source="A.java", chunk_index=0)
+    results = [[shared, doc("only a", score=0.55, source="B.java", chunk_index=0)], [shared]]
+    ranked = rerank_documents(results, groups)
+    assert [item.page_content for item in ranked] == ["shared", "only a"]
+
+
+def test_code_context_skips_chunks_over_budget_but_keeps_smaller_ones():
+    docs = [doc("x" * 40), doc("y" * 4000), doc("z" * 40)]
+    budget = estimate_tokens("x" * 40) * 3
+    context, used, packed = build_code_context(docs, budget)
+    assert packed == 2 and "y" not in context
+    assert used <= budget
+
+def test_log_question_drops_least_frequent_logs_first_within_budget():
+    groups = [log_group(f"error {index} " + "detail " * 50, count=count) for index, count in enumerate([5, 1, 3, 1])]
+    full = build_log_question(groups, 100000)
+    budget = estimate_tokens(full) // 2
+
+    question = build_log_question(groups, budget)
+    entries = json.loads(question)
+    assert estimate_tokens(question) <= budget
+    kept = [entry["message"].split()[1] for entry in entries if "message" in entry]
+    assert kept[0] == "0" and "3" not in kept
+    assert entries[-1] == {"omitted_unique_logs": 4 - len(kept)}
+
+def test_log_question_keeps_one_log_and_strips_noise_from_the_rest():
+    groups = [log_group("first " * 500, count=1), log_group("second", count=2)]
+    entries = json.loads(build_log_question(groups, 10000))
+    assert "timestamp" in entries[0] and "timestamp" not in entries[1]
+    assert entries[1]["occurrences"] == 2
+    assert len(json.loads(build_log_question(groups, 1))) == 2  # 로그 1개 + 생략 표시
+
+def test_prompt_context_stays_within_total_budget():
+    groups = [log_group(f"error {index} " + "detail " * 30, count=index + 1) for index in range(5)]
+    results = [[doc(f"chunk {index} " + "code " * 200, score=0.5)] for index in range(5)]
+    budget = 1500
+    inputs = build_prompt_context(results, groups, budget, 0.3)
+    assert estimate_tokens(inputs["question"]) <= budget * 0.3
+    assert estimate_tokens(inputs["question"]) + estimate_tokens(inputs["context"]) <= budget
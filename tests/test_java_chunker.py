@@ -0,0 +1,104 @@
+"""java_chunker 클래스/메소드 경계 분할과 긴 청크 창 분할 확인
+
+    python -m pytest tests
+"""
+from java_chunker import OVERSIZE_OVERLAP_LINES, chunk_java_source
+
+SOURCE = """package com.example.order;
+
+import java.util.List;
+
+/** 주문 서비스 */
+public class OrderService {
+    private final String prefix = "{not a block";
+
+    public OrderService() {
+        // 생성자 } 주석 안의 괄호
+    }
+
+    /**
+     * 주문 생성
+     */
+    @Transactional(readOnly = false)
+    public Order place(List<Item> items) {
+        if (items.isEmpty()) {
+            throw new IllegalArgumentException("empty }");
+        }
+        Runnable task = new Runnable() {
+            public void run() {}
+        };
+        return new Order(items);
+    }
+
+    static class Validator {
+        boolean check(Order order) {
+            return order != null;
+        }
+    }
+}
+"""
+
+
+def chunks_by_symbol(chunks):
+    return {chunk.symbol(): chunk for chunk in chunks}
+
+
+def test_splits_class_and_methods_with_symbols():
+    chunks = chunks_by_symbol(chunk_java_source(SOURCE))
+    assert set(chunks) == {
+        "com.example.order.OrderService",
+        "com.example.order.OrderService#OrderService",
+        "com.example.order.OrderService#place",
+        "com.example.order.OrderService.Validator",
+        "com.example.order.OrderService.Validator#check",
+    }
+    place = chunks["com.example.order.OrderService#place"]
+    assert place.kind == "method"
+    assert place.signature == "public Order place(List<Item> items)"
+    # Javadoc/어노테이션 줄부터 메소드 끝까지 (익명 클래스는 메소드 청크 안에 포함)
+    assert place.content.startswith("    /**")
+    assert "public void run() {}" in place.content
+    assert place.content.rstrip().endswith("}")
+
+
+def test_class_chunk_keeps_header_and_fields_without_method_bodies():
+    chunks = chunks_by_symbol(chunk_java_source(SOURCE))
+    service = chunks["com.example.order.OrderService"]
+    assert service.start_line == 1
+    assert "import java.util.List;" in service.content
+    assert 'private final String prefix = "{not a block";' in service.content
+    assert "IllegalArgumentException" not in service.content
+    assert "boolean check" not in service.content
+
+
+def test_braces_in_strings_and_comments_do_not_break_blocks():
+    chunks = chunks_by_symbol(chunk_java_source(SOURCE))
+    constructor = chunks["com.example.order.OrderService#OrderService"]
+    assert (constructor.start_line, constructor.end_line) == (9, 11)
+
+
+def test_unbalanced_source_falls_back_to_file_chunks():
+    chunks = chunk_java_source("package a;\nclass Broken {\n  void f() {\n")
+    assert [(chunk.kind, chunk.package, chunk.start_line, chunk.end_line) for chunk in chunks] == [("file", "a", 1, 3)]
+
+
+def test_long_method_is_split_into_overlapping_windows():
+    body = "\n".join(f"        int value{index} = {index};" for index in range(200))
+    source = f"class Big {{\n    void run() {{\n{body}\n    }}\n}}\n"
+    max_chars = 1000
+    windows = [chunk for chunk in chunk_java_source(source, max_chars=max_chars) if chunk.method == "run"]
+
+    assert len(windows) > 1
+    assert all(len(chunk.content) <= max_chars for chunk in windows)
+    assert windows[0].start_line == 2 and windows[-1].end_line == 203
+    for previous, current in zip(windows, windows[1:]):
+        overlap = previous.end_line - current.start_line + 1
+        assert 1 <= overlap <= OVERSIZE_OVERLAP_LINES
+        assert current.signature == previous.signature == "void run()"
+
+
+def test_single_long_line_is_truncated_not_looped():
+    source = "class Minified { void f() { " + "call(); " * 2000 + "} }"
+    chunks = chunk_java_source(source, max_chars=500)
+    assert chunks and all(len(chunk.content) <= 500 for chunk in chunks)
+    assert all(chunk.start_line == chunk.end_line == 1 for chunk in chunks)
@@ -0,0 +1,113 @@
+"""llm_runner 재시도/헤징/대체 모델/출력 복구/재요청 확인 (benchmarks/fakes.py의 가짜 채팅 모델 사용)
+
+    python -m pytest tests
+"""
+import json
+import asyncio
+from typing import Any, List
+import httpx
+import openai
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.output_parsers import PydanticOutputParser
+
+from fakes import FakeChatModel, sample_output
+from log_summary_prompt import get_prompt_template, get_output_schema
+import rag_service
+from exceptions import LLMResponseError
+from llm_runner import invoke_llm, REASK_PROMPT
+from settings import settings
+
+ANSWER = sample_output(get_output_schema())
+VALID = json.dumps(ANSWER, ensure_ascii=False)
+INPUTS = {"question": "NullPointerException", "context": "class A {}"}
+
+
+def connection_error() -> Exception:
+    return openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+
+# 호출할 때마다 script에서 (지연 시간 초, 응답 텍스트 또는 예외)를 하나씩 꺼내 응답 (마지막 단계는 계속 반복)
+class ScriptedChatModel(FakeChatModel):
+    script: List[Any] = []
+    calls: List[Any] = []
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(messages)
+        delay, outcome = self.script[min(len(self.calls), len(self.script)) - 1]
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=outcome))])
+
+
+@pytest.fixture(autouse=True)
+def runner(monkeypatch):
+    monkeypatch.setattr(rag_service, "prompts", {"log_summary": get_prompt_template()})
+    monkeypatch.setattr(rag_service, "parsers", {"log_summary": PydanticOutputParser(pydantic_object=get_output_schema())})
+    monkeypatch.setattr(rag_service, "llms", {})
+    for name, value in {
+        "llm_timeout_seconds": 2.0, "llm_attempt_timeout_seconds": 0.0, "llm_max_retries": 2,
+        "llm_retry_backoff_seconds": 0.01, "llm_hedge_after_seconds": 0.0, "llm_parse_retries": 1,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+
+def use_models(**scripts) -> List[ScriptedChatModel]:
+    models = [ScriptedChatModel(script=script, calls=[]) for script in scripts.values()]
+    rag_service.llms.update(zip(scripts, models))
+    return models
+
+def run(deadline_seconds=None):
+    async def call():
+        deadline = None if deadline_seconds is None else asyncio.get_running_loop().time() + deadline_seconds
+        return await invoke_llm("log_summary", INPUTS, deadline)
+    return asyncio.run(call())
+
+
+def test_retries_transient_errors():
+    primary, = use_models(primary=[(0, connection_error()), (0, VALID)])
+    assert run() == (ANSWER, "primary")
+    assert len(primary.calls) == 2
+
+def test_non_retryable_error_is_llm_error():
+    primary, = use_models(primary=[(0, ValueError("bad request"))])
+    with pytest.raises(LLMResponseError):
+        run()
+    assert len(primary.calls) == 1
+
+def test_hedged_request_wins_when_first_is_slow(monkeypatch):
+    monkeypatch.setattr(settings, "llm_hedge_after_seconds", 0.05)
+    primary, = use_models(primary=[(10, VALID), (0, VALID)])
+    assert run() == (ANSWER, "primary")
+    assert len(primary.calls) == 2
+
+def test_falls_back_when_primary_keeps_timing_out(monkeypatch):
+    monkeypatch.setattr(settings, "llm_timeout_seconds", 1.0)
+    monkeypatch.setattr(settings, "llm_attempt_timeout_seconds", 0.3)
+    primary, fallback = use_models(primary=[(10, VALID)], fallback=[(0.2, VALID)])
+    assert run() == (ANSWER, "fallback")
+    assert primary.calls and len(fallback.calls) == 1
+
+def test_times_out_without_fallback():
+    use_models(primary=[(10, VALID)])
+    with pytest.raises(asyncio.TimeoutError):
+        run(deadline_seconds=0.2)
+
+def test_repairs_text_around_json():
+    primary, = use_models(primary=[(0, f"분석 결과입니다.\n{VALID}\n참고하세요.")])
+    assert run() == (ANSWER, "primary")
+    assert len(primary.calls) == 1
+
+def test_reasks_with_parse_error_after_invalid_json():
+    primary, = use_models(primary=[(0, '{"summary": '), (0, VALID)])
+    assert run() == (ANSWER, "primary")
+    assert len(primary.calls) == 2
+    reask = primary.calls[1][-1].content
+    assert reask.startswith(REASK_PROMPT.split("{error}")[0])
+
+def test_reask_call_failure_is_llm_error(monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_retries", 0)
+    use_models(primary=[(0, "not json"), (0, connection_error())])
+    with pytest.raises(LLMResponseError):
+        run()
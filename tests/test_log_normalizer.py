@@ -0,0 +1,65 @@
+"""log_normalizer 지문/정규화 규칙 확인 (LLM 프롬프트에 어떤 로그가 들어갈지 결정하는 규칙)
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+import pytest
+
+sys.path[:0] = [str(Path(__file__).resolve().parent.parent / "ssom_server")]
+
+from log_normalizer import group_logs, normalize_text, normalize_value
+
+
+# 상태/오류 코드는 유지
+@pytest.mark.parametrize("text", [
+    "HTTP 500 Internal Server Error",
+    "HTTP 404 Not Found",
+    "ORA-00001: unique constraint violated",
+    "ORA-01400: cannot insert NULL",
+    "E11000 duplicate key error",
+    "process exited with code 137",
+])
+def test_keeps_status_and_error_codes(text):
+    assert normalize_text(text) == text
+
+
+# 요청마다 달라지는 ID/건수/시간/주소는 제거
+@pytest.mark.parametrize("text, expected", [
+    ("user 123456 not found", "user <n> not found"),
+    ("userId=42 failed", "userId=<n> failed"),
+    ("order #991 rejected", "order #<n> rejected"),
+    ("request took 1532ms", "request took <n>ms"),
+    ("Connection refused to 10.0.3.21:5432", "Connection refused to <ip>:<n>"),
+    ("2024-05-01T10:00:00.123Z failed", "<ts> failed"),
+    ("job 3f2b9c1e-0c1a-4c56-9a3e-2f1d5e6b7a8c stopped", "job <id> stopped"),
+    ("at com.x.OrderService.place(OrderService.java:123)", "at com.x.OrderService.place(OrderService.java)"),
+])
+def test_strips_variable_numbers(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_different_status_codes_are_separate_groups():
+    groups = group_logs([{"message": "HTTP 500"}, {"message": "HTTP 404"}, {"message": "HTTP 500"}])
+    assert [(group.log["message"], group.count) for group in groups] == [("HTTP 500", 2), ("HTTP 404", 1)]
+
+def test_different_ids_are_one_group():
+    groups = group_logs([{"message": f"user {user_id} not found", "userId": user_id} for user_id in (10001, 10002, 98765)])
+    assert len(groups) == 1 and groups[0].count == 3
+
+
+def test_numeric_fields():
+    normalized = normalize_value({"status": 500, "userId": 7, "elapsedMs": 12, "ratio": 0.3, "total": 123456, "ok": True})
+    assert normalized == {"status": 500, "userId": "<n>", "elapsedMs": "<n>", "ratio": "<n>", "total": "<n>", "ok": True}
+
+
+def test_stack_trace_fingerprint_ignores_line_numbers_and_message_ids():
+    def log(line, order_id):
+        return {
+            "message": f"failed to place order {order_id}",
+            "stackTrace": f"java.lang.IllegalStateException: order {order_id}\n\tat com.x.OrderService.place(OrderService.java:{line})",
+        }
+    groups = group_logs([log(10, 100001), log(12, 100002)])
+    assert len(groups) == 1
+    assert groups[0].exception == "java.lang.IllegalStateException"
+    assert groups[0].frames == ["com.x.OrderService.place"]